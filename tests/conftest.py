@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+# 基素数表与校准结果写进临时目录，不碰用户缓存；必须在导入 素数核心 之前设置
+os.environ["PRIME_CACHE_DIR"] = tempfile.mkdtemp(prefix="primes-test-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import 素数核心  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fixed_calibration(monkeypatch):
+    # 自动选择引擎时不在测试里测速，固定选轮式分段筛
+    monkeypatch.setattr(素数核心, "_calibration", {"engines": {"wheel": {"1000": 1e-6}}})
+
+
+def reference_primes(a, b):
+    # 逐个试除，作为各实现的对照
+    return [n for n in range(max(a, 2), b + 1) if all(n % d for d in range(2, int(n ** 0.5) + 1))]
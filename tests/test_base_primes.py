@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import BASE_PRIME_MIN_LIMIT, BASE_PRIME_MAX_LIMIT, BasePrimeTable
+
+
+@pytest.fixture
+def filename(tmp_path):
+    return str(tmp_path / "primes_base.bin")
+
+
+def test_table_is_persisted_and_reused(filename):
+    table = BasePrimeTable(filename)
+    assert list(table.get(1000)) == reference_primes(0, 1000)
+    assert table.limit == BASE_PRIME_MIN_LIMIT
+    size = os.path.getsize(filename)
+    reopened = BasePrimeTable(filename)
+    assert list(reopened.get(5000)) == reference_primes(0, 5000)
+    # 从文件映射而来，没有重新筛
+    assert reopened._mmap is not None and os.path.getsize(filename) == size
+
+
+def test_table_grows_and_rewrites_file(filename):
+    table = BasePrimeTable(filename)
+    table.get(100)
+    table.get(3 * BASE_PRIME_MIN_LIMIT)
+    assert table.limit >= 3 * BASE_PRIME_MIN_LIMIT
+    reopened = BasePrimeTable(filename)
+    primes = reopened.get(3 * BASE_PRIME_MIN_LIMIT)
+    assert reopened.limit == table.limit
+    assert primes[-1] == reference_primes(3 * BASE_PRIME_MIN_LIMIT - 100, 3 * BASE_PRIME_MIN_LIMIT)[-1]
+
+
+@pytest.mark.parametrize("damage", ["truncate", "magic", "empty"])
+def test_damaged_file_is_rebuilt(filename, damage):
+    BasePrimeTable(filename).get(100)
+    with open(filename, "r+b") as f:
+        if damage == "truncate":
+            f.truncate(os.path.getsize(filename) - 6)
+        elif damage == "magic":
+            f.write(b"XXXX")
+        else:
+            f.truncate(0)
+    table = BasePrimeTable(filename)
+    assert list(table.get(2000)) == reference_primes(0, 2000)
+    # 重建后的文件完整，下次直接映射
+    reopened = BasePrimeTable(filename)
+    assert list(reopened.get(2000)) == reference_primes(0, 2000)
+    assert reopened._mmap is not None
+
+
+def test_grow_keeps_mapping_held_by_callers(filename):
+    BasePrimeTable(filename).get(100)
+    table = BasePrimeTable(filename)
+    held = table.get(1000)
+    table.get(4 * BASE_PRIME_MIN_LIMIT)
+    # 旧映射仍有切片引用：新表只在内存里，旧切片照常可读
+    assert list(held) == reference_primes(0, 1000)
+    top = 4 * BASE_PRIME_MIN_LIMIT
+    assert table.get(top)[-1] == reference_primes(top - 200, top)[-1]
+    probe = BasePrimeTable(filename)
+    probe.get(10)
+    assert probe.limit < top
+    del held
+    table.get(16 * BASE_PRIME_MIN_LIMIT)
+    assert BasePrimeTable(filename).get(16 * BASE_PRIME_MIN_LIMIT)[-1] == table.get(16 * BASE_PRIME_MIN_LIMIT)[-1]
+
+
+def test_limit_beyond_uint32_is_rejected(filename):
+    with pytest.raises(ValueError):
+        BasePrimeTable(filename).get(BASE_PRIME_MAX_LIMIT + 1)
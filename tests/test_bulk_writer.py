@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from 素数核心 import BulkWriter, encode_lines, save_primes_ndappend
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_writes_encoded_blocks_in_order(threaded):
+    out = []
+    with BulkWriter(out.append, encode_lines, threaded=threaded, max_pending=2) as writer:
+        for k in range(50):
+            writer.write([k, k + 1])
+    assert out == [f"{k}\n{k + 1}\n".encode() for k in range(50)]
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_after_runs_once_earlier_blocks_are_written(threaded):
+    out, marks = [], []
+    with BulkWriter(out.append, threaded=threaded) as writer:
+        for k in range(20):
+            writer.write(k)
+            if k % 5 == 4:
+                writer.after(lambda: marks.append(list(out)))
+    assert marks == [list(range(k + 1)) for k in (4, 9, 14, 19)]
+
+
+def test_threaded_writes_happen_off_the_caller_thread():
+    threads = set()
+    writer = BulkWriter(lambda block: threads.add(threading.current_thread()), threaded=True)
+    writer.write(b"x")
+    writer.flush()
+    writer.close()
+    assert threads and threading.current_thread() not in threads
+
+
+def failing_write(after):
+    count = 0
+
+    def write(block):
+        nonlocal count
+        count += 1
+        if count > after:
+            raise OSError("disk full")
+    return write
+
+
+def test_error_is_raised_on_next_call():
+    writer = BulkWriter(failing_write(1), threaded=True, max_pending=1)
+    with pytest.raises(OSError, match="disk full"):
+        # 写线程出错后继续取空队列，生产者不会卡住，后续 write 或 flush 会抛出
+        for k in range(100):
+            writer.write(k)
+        writer.flush()
+    with pytest.raises(OSError):
+        writer.close()
+
+
+def test_error_skips_later_callbacks():
+    calls = []
+    writer = BulkWriter(failing_write(0), threaded=True)
+    writer.write(0)
+    writer.after(lambda: calls.append("checkpoint"))
+    with pytest.raises(OSError):
+        writer.close()
+    assert calls == []
+
+
+def test_context_manager_raises_writer_error():
+    with pytest.raises(OSError):
+        with BulkWriter(failing_write(0)) as writer:
+            writer.write(0)
+
+
+def test_body_error_wins_over_writer_error():
+    with pytest.raises(KeyError):
+        with BulkWriter(failing_write(0), threaded=True) as writer:
+            writer.write(0)
+            writer._queue.join()
+            raise KeyError("body")
+
+
+def test_save_primes_ndappend(tmp_path):
+    path = tmp_path / "primes.ndjson"
+    save_primes_ndappend(iter(range(12000)), str(path))
+    save_primes_ndappend([12000], str(path))
+    assert path.read_text().split() == [str(k) for k in range(12001)]
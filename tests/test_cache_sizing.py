@@ -0,0 +1,77 @@
+from itertools import chain
+
+import pytest
+
+import 素数核心
+from conftest import reference_primes
+from 素数核心 import FALLBACK_CACHE_SIZES, _cpu_count_in, cpu_cache_sizes, segmented_sieve_blocks
+
+
+def fake_sysfs(root, caches):
+    for k, fields in enumerate(caches):
+        index = root / f"index{k}"
+        index.mkdir()
+        for field, value in fields.items():
+            (index / field).write_text(value + "\n")
+    (root / "uevent").write_text("")
+    return str(root)
+
+
+@pytest.fixture
+def sysfs(tmp_path, monkeypatch):
+    def use(caches):
+        monkeypatch.setattr(素数核心, "CPU_CACHE_DIR", fake_sysfs(tmp_path, caches))
+        monkeypatch.setattr(素数核心, "_cache_sizes", None)
+        return cpu_cache_sizes()
+    return use
+
+
+def test_cpu_count_in():
+    assert _cpu_count_in("0") == 1
+    assert _cpu_count_in("0-3,8-11\n") == 8
+    assert _cpu_count_in("0,2,4-5") == 4
+
+
+def test_cpu_cache_sizes_from_sysfs(sysfs):
+    sizes = sysfs([
+        {"level": "1", "type": "Data", "size": "48K", "shared_cpu_list": "0-1"},
+        {"level": "1", "type": "Instruction", "size": "32K", "shared_cpu_list": "0-1"},
+        {"level": "2", "type": "Unified", "size": "2048K", "shared_cpu_list": "0-1"},
+        {"level": "3", "type": "Unified", "size": "30M", "shared_cpu_list": "0-11"},
+    ])
+    # 共享的缓存按共享核数平分，指令缓存不算
+    assert sizes == {1: 24 << 10, 2: 1 << 20, 3: (30 << 20) // 12}
+    assert 素数核心.default_segment_bytes() == 1 << 20
+
+
+def test_cpu_cache_sizes_skips_unreadable_entries(sysfs):
+    sizes = sysfs([
+        {"level": "1", "type": "Data", "size": "32K"},
+        {"level": "2", "type": "Unified", "size": "lots"},
+        {"type": "Unified", "size": "8M"},
+    ])
+    assert sizes == {1: 32 << 10, 2: FALLBACK_CACHE_SIZES[2]}
+
+
+def test_cpu_cache_sizes_without_sysfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(素数核心, "CPU_CACHE_DIR", str(tmp_path / "missing"))
+    monkeypatch.setattr(素数核心, "_cache_sizes", None)
+    assert cpu_cache_sizes() == FALLBACK_CACHE_SIZES
+
+
+@pytest.mark.parametrize("l2", [64, 256, 400])
+def test_default_segment_uses_bucket_sieve(monkeypatch, l2):
+    # 段长按 L2 取；区间跨多段且基素数不小于段长时走桶筛
+    monkeypatch.setattr(素数核心, "_cache_sizes", {1: 32 << 10, 2: l2})
+    start = 10 ** 7 + 13
+    end = start + 30 * l2 * 5
+    assert 素数核心._sieving_primes(end)[-1] >= l2
+    assert list(chain.from_iterable(segmented_sieve_blocks(start, end))) == reference_primes(start, end)
+
+
+def test_bucket_sieve_matches_plain_segments(monkeypatch):
+    start, end = 10 ** 9, 10 ** 9 + 30 * 4096
+    plain = list(chain.from_iterable(segmented_sieve_blocks(start, end, segment_size=30 * 8192)))
+    monkeypatch.setattr(素数核心, "_cache_sizes", {1: 32 << 10, 2: 512})
+    assert list(chain.from_iterable(segmented_sieve_blocks(start, end))) == plain
+    assert len(plain) == 素数核心.prime_count_range(start, end)
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import Checkpoint, GenerationJob, PrimeStore
+from 素数生成器_fixed import main
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    ckpt = Checkpoint(str(tmp_path / "job.ckpt"))
+    assert ckpt.load() is None
+    ckpt.save({"next": 10})
+    assert ckpt.load() == {"next": 10}
+    assert not os.path.exists(ckpt.filename + ".tmp")
+    ckpt.clear()
+    assert ckpt.load() is None
+
+
+def interrupted_output(path, start, end, stop):
+    # 模拟中途被杀：断点记到 stop 之前，文件尾部还有断点之后写出的半行
+    done = reference_primes(start, stop - 1)
+    data = "".join(f"{p}\n" for p in done).encode()
+    with open(path, "wb") as f:
+        f.write(data + b"99")
+    state = {"start": start, "end": end, "digit": None, "mod": None,
+             "next": stop, "count": len(done), "offset": len(data)}
+    with open(path + ".ckpt", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    return state
+
+
+def test_cli_resume_continues_from_offset(tmp_path):
+    out = str(tmp_path / "primes.txt")
+    interrupted_output(out, 0, 5000, 2000)
+    assert main(["generate", "0", "5000", "-o", out, "--resume", "--engine", "wheel"]) == 0
+    with open(out, encoding="utf-8") as f:
+        assert [int(line) for line in f] == reference_primes(0, 5000)
+    assert not os.path.exists(out + ".ckpt")
+
+
+def test_cli_resume_refuses_short_file(tmp_path):
+    out = str(tmp_path / "primes.txt")
+    state = interrupted_output(out, 0, 5000, 2000)
+    with open(out, "r+b") as f:
+        f.truncate(state["offset"] - 3)
+    with pytest.raises(SystemExit):
+        main(["generate", "0", "5000", "-o", out, "--resume", "--engine", "wheel"])
+    assert os.path.getsize(out) == state["offset"] - 3
+
+
+def test_cli_resume_rejects_other_job(tmp_path):
+    out = str(tmp_path / "primes.txt")
+    interrupted_output(out, 0, 5000, 2000)
+    with pytest.raises(SystemExit):
+        main(["generate", "0", "6000", "-o", out, "--resume", "--engine", "wheel"])
+
+
+def test_generation_job_resume(tmp_path):
+    db = str(tmp_path / "db.pbin")
+    job = GenerationJob(100, 20000, filename=db)
+    job.cancel()
+    job.run()
+    assert GenerationJob.pending(db) is not None
+    # 断点之前的部分已在库中，之后由 resume 接着生成
+    PrimeStore(db).append(reference_primes(100, 9999))
+    state = GenerationJob.pending(db)
+    state["next"] = 10000
+    Checkpoint(db + ".job.json").save(state)
+    resumed = GenerationJob.resume(db)
+    assert resumed.next == 10000
+    resumed.run()
+    assert GenerationJob.pending(db) is None
+    assert list(PrimeStore(db)) == reference_primes(100, 20000)
@@ -0,0 +1,128 @@
+import io
+import sys
+
+import pytest
+
+import 素数核心
+from conftest import reference_primes
+from 素数生成器_fixed import main
+
+
+def run(capsys, *argv, stdin=None):
+    if stdin is not None:
+        sys.stdin = io.StringIO(stdin)
+    try:
+        status = main(list(argv))
+    finally:
+        sys.stdin = sys.__stdin__
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def ints(text):
+    return [int(line) for line in text.split()]
+
+
+def test_generate(capsys, tmp_path):
+    status, out, _ = run(capsys, "generate", "100", "1000", "--engine", "wheel")
+    assert status == 0 and ints(out) == reference_primes(100, 1000)
+    _, out, _ = run(capsys, "generate", "0", "1000", "--digit", "7")
+    assert ints(out) == [p for p in reference_primes(0, 1000) if p % 10 == 7]
+    _, out, _ = run(capsys, "generate", "0", "1000", "--mod", "5", "12")
+    assert ints(out) == [p for p in reference_primes(0, 1000) if p % 12 == 5]
+
+
+def test_generate_to_file_and_store(capsys, tmp_path):
+    out_file, db = str(tmp_path / "p.txt"), str(tmp_path / "db.pbin")
+    run(capsys, "--db", db, "generate", "0", "500", "-o", out_file, "--save")
+    with open(out_file, encoding="utf-8") as f:
+        assert ints(f.read()) == reference_primes(0, 500)
+    assert list(素数核心.PrimeStore(db)) == reference_primes(0, 500)
+    assert 素数核心.PrimeStore(db).covered() == [(0, 500)]
+
+
+@pytest.mark.parametrize("argv", [
+    ["generate", "10", "5"],
+    ["generate", "0", "10", "--mod", "1", "0"],
+    ["generate", "0", str(10 ** 11), "--engine", "atkin"],
+    ["generate", str(2 ** 64), str(2 ** 64 + 100), "--engine", "wheel"],
+    ["count", "0", str(2 ** 64)],
+    ["factor-range", "0", str(2 ** 64)],
+    ["gaps", "0", str(2 ** 64), "10"],
+    ["histogram", "0", "100", "0"],
+    ["export", "--sieve"],
+])
+def test_invalid_requests_exit_with_message(capsys, argv):
+    with pytest.raises(SystemExit) as e:
+        main(argv)
+    assert isinstance(e.value.code, str)
+
+
+def test_count(capsys):
+    _, out, _ = run(capsys, "count", "1000", "100000")
+    assert int(out) == len(reference_primes(1000, 100000))
+
+
+def test_is_prime(capsys):
+    status, out, _ = run(capsys, "is-prime", "1", "2", "91", "97", str(2 ** 89 - 1))
+    assert status == 0
+    assert out.split("\n")[:-1] == ["1 composite", "2 prime", "91 composite", "97 prime", f"{2 ** 89 - 1} prime"]
+    _, out, _ = run(capsys, "is-prime", "--certify", str(2 ** 89 - 1), "15")
+    assert out == f"{2 ** 89 - 1} prime\n15 composite\n"
+
+
+def test_is_prime_stdin_skips_bad_lines(capsys):
+    status, out, err = run(capsys, "is-prime", stdin="12\n97\nabc\n\n5\n")
+    assert status == 1
+    assert out == "12 composite\n97 prime\n5 prime\n"
+    assert "abc" in err
+
+
+def test_factor(capsys):
+    status, out, _ = run(capsys, "factor", "1", "360", str(2 ** 67 - 1))
+    assert status == 0
+    assert out == f"1:\n360: 2 2 2 3 3 5\n{2 ** 67 - 1}: 193707721 761838257287\n"
+    status, out, err = run(capsys, "factor", stdin="12\n-3\n")
+    assert status == 1 and out == "12: 2 2 3\n" and "-3" in err
+
+
+def test_factor_range(capsys):
+    _, out, _ = run(capsys, "factor-range", "0", "12")
+    lines = out.splitlines()
+    assert lines[0] == "0:" and lines[1] == "1:" and lines[12] == "12: 2 2 3"
+
+
+def test_histogram(capsys):
+    _, out, _ = run(capsys, "histogram", "0", "999", "250")
+    for line in out.splitlines():
+        label, count = line.split("\t")
+        lo, hi = map(int, label.split("-"))
+        assert int(count) == len(reference_primes(lo, hi))
+    assert out.splitlines()[-1].startswith("752-999\t")
+
+
+def test_gaps(capsys):
+    _, out, _ = run(capsys, "gaps", "0", "999", "500", "--engine", "wheel")
+    header, *rows = out.splitlines()
+    assert header.split("\t")[0] == "range"
+    assert [int(row.split("\t")[1]) for row in rows] == [95, 73]
+
+
+def test_export(capsys, tmp_path):
+    db = str(tmp_path / "db.pbin")
+    素数核心.PrimeStore(db).append(reference_primes(0, 1000))
+    _, out, _ = run(capsys, "--db", db, "export", "--start", "100", "--end", "200")
+    assert ints(out) == reference_primes(100, 200)
+    target = str(tmp_path / "p.pgap")
+    _, _, err = run(capsys, "export", "--sieve", "--start", "0", "--end", "5000", "-o", target)
+    assert "669" in err
+    assert list(素数核心.iter_gap_file(target)) == reference_primes(0, 5000)
+
+
+def test_calibrate(capsys, tmp_path, monkeypatch):
+    table = {"version": 素数核心.CALIBRATION_VERSION, "host": {}, "engines": {"wheel": {"1000": 0.001}}}
+    monkeypatch.setattr(素数核心, "calibrate_sieves", lambda sizes=None: table)
+    target = str(tmp_path / "calibration.json")
+    _, out, _ = run(capsys, "calibrate", "--file", target)
+    assert out == "wheel\t1000\t0.0010\n"
+    assert 素数核心.Checkpoint(target).load() == table
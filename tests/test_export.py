@@ -0,0 +1,96 @@
+import ast
+import gzip
+import struct
+from array import array
+
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import NPY_HEADER_SIZE, export_primes, iter_gap_file, sieve_blocks
+
+PRIMES = reference_primes(0, 30000)
+
+
+def blocks_of(values, size=1000):
+    return [array("Q", values[i:i + size]) for i in range(0, len(values), size)]
+
+
+def read_npy(path):
+    raw = path.read_bytes()
+    assert raw[:8] == b"\x93NUMPY\x01\x00"
+    length = struct.unpack("<H", raw[8:10])[0]
+    assert 10 + length == NPY_HEADER_SIZE
+    header = ast.literal_eval(raw[10:10 + length].decode("latin1"))
+    data = array("Q")
+    data.frombytes(raw[10 + length:])
+    return header, list(data)
+
+
+def test_export_txt(tmp_path):
+    path = tmp_path / "primes.txt"
+    assert export_primes(blocks_of(PRIMES), str(path)) == len(PRIMES)
+    assert list(map(int, path.read_text().split())) == PRIMES
+
+
+def test_export_gz(tmp_path):
+    path = tmp_path / "primes.gz"
+    assert export_primes(blocks_of(PRIMES), str(path)) == len(PRIMES)
+    with gzip.open(path, "rt") as f:
+        assert [int(line) for line in f] == PRIMES
+
+
+def test_export_npy(tmp_path):
+    path = tmp_path / "primes.npy"
+    assert export_primes(blocks_of(PRIMES) + [array("Q")], str(path)) == len(PRIMES)
+    header, values = read_npy(path)
+    assert header == {"descr": "<u8", "fortran_order": False, "shape": (len(PRIMES),)}
+    assert values == PRIMES
+
+
+@pytest.mark.parametrize("values", [
+    PRIMES,
+    reference_primes(3, 500),
+    reference_primes(5, 500),
+    # 大于 128 的差要多字节变长编码
+    [2, 3, 5, 1327, 1361, 10 ** 12 + 39, 10 ** 12 + 61, 2 ** 63 + 29],
+])
+def test_export_pgap_roundtrip(tmp_path, values):
+    path = tmp_path / "primes.pgap"
+    assert export_primes(blocks_of(values, 7), str(path)) == len(values)
+    assert list(iter_gap_file(str(path))) == values
+
+
+def test_export_pgap_from_sieve(tmp_path):
+    path = tmp_path / "primes.pgap"
+    count = export_primes(sieve_blocks(10 ** 9, 10 ** 9 + 5000, "wheel"), str(path))
+    got = list(iter_gap_file(str(path)))
+    assert len(got) == count and got == reference_primes(10 ** 9, 10 ** 9 + 5000)
+    # 差值一字节一个，远小于文本
+    assert path.stat().st_size < 2 * count + 16
+
+
+def test_iter_gap_file_rejects_other_files(tmp_path):
+    path = tmp_path / "primes.txt"
+    path.write_text("2\n3\n")
+    with pytest.raises(ValueError):
+        list(iter_gap_file(str(path)))
+
+
+def test_export_zst(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "primes.zst"
+    assert export_primes(blocks_of(PRIMES), str(path)) == len(PRIMES)
+    data = zstandard.ZstdDecompressor().stream_reader(path.read_bytes()).read()
+    assert list(map(int, data.split())) == PRIMES
+
+
+def test_export_format_errors(tmp_path):
+    with pytest.raises(ValueError):
+        export_primes([], str(tmp_path / "x.txt"), fmt="csv")
+    with pytest.raises(ValueError):
+        export_primes([], "-", fmt="npy")
+
+
+def test_export_to_stdout(capsysbinary):
+    assert export_primes(blocks_of(PRIMES[:100]), "-") == 100
+    assert list(map(int, capsysbinary.readouterr().out.split())) == PRIMES[:100]
@@ -0,0 +1,77 @@
+import math
+
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import SPF_BLOCK_SIZE, SpfTable, ecm_factor, factor_range, is_prime, pollard_brent, prime_factors
+
+
+def check_factors(n, factors):
+    assert factors == sorted(factors)
+    assert all(is_prime(p) for p in factors)
+    assert math.prod(factors) == n
+
+
+def test_prime_factors_known_values():
+    assert prime_factors(2 ** 67 - 1) == [193707721, 761838257287]
+    assert prime_factors(600851475143) == [71, 839, 1471, 6857]
+    assert prime_factors(2 ** 61 - 1) == [2 ** 61 - 1]
+    assert prime_factors(3 ** 40) == [3] * 40
+    assert prime_factors(0) == [] and prime_factors(1) == []
+
+
+def test_prime_factors_small_against_trial_division():
+    # 最小素因子表覆盖的范围
+    for n in list(range(2, 3000)) + [999983, 999999, 10 ** 6]:
+        check_factors(n, prime_factors(n))
+
+
+@pytest.mark.parametrize("n", [
+    (2 ** 31 - 1) * (2 ** 31 - 1),        # 完全平方，走完全幂分支
+    1000000007 * 998244353,
+    (2 ** 61 - 1) * 1000000007 * 65537,
+    2 ** 20 * 3 ** 5 * (2 ** 89 - 1),
+])
+def test_prime_factors_composites(n):
+    check_factors(n, prime_factors(n))
+
+
+def test_pollard_brent_finds_factor():
+    n = 1000003 * 999983
+    assert pollard_brent(n) in (1000003, 999983)
+    assert pollard_brent(2 * 1000003) == 2
+
+
+def test_pollard_brent_gives_up():
+    assert pollard_brent(1000000007 * 998244353, max_steps=4) is None
+
+
+def test_ecm_factor():
+    n = 1000000007 * 998244353
+    assert ecm_factor(n, seed=1) in (1000000007, 998244353)
+    d = ecm_factor((2 ** 31 - 1) * (2 ** 61 - 1), seed=2)
+    assert d in (2 ** 31 - 1, 2 ** 61 - 1)
+
+
+def test_spf_table():
+    limit = 3 * SPF_BLOCK_SIZE + 17   # 跨几个填表块
+    table = SpfTable(limit)
+    assert table.spf.typecode == "H" and len(table.spf) == limit + 1
+    primes = set(reference_primes(0, 5000))
+    for n in range(5001):
+        expected = 0 if n < 2 or n in primes else min(p for p in primes if n % p == 0)
+        assert table.spf[n] == expected
+    for n in list(range(2, 5000)) + list(range(limit - 500, limit + 1)):
+        check_factors(n, table.factor(n))
+    assert table.factor(1) == [] and table.factor(0) == []
+
+
+@pytest.mark.parametrize("a, b, segment_size", [(0, 3000, 1000), (2, 3000, 7), (10 ** 6 - 100, 10 ** 6 + 100, 64), (10 ** 12, 10 ** 12 + 300, 100)])
+def test_factor_range(a, b, segment_size):
+    got = list(factor_range(a, b, segment_size))
+    assert [n for n, _ in got] == list(range(a, b + 1))
+    for n, factors in got:
+        if n == 0:
+            assert factors == []
+        else:
+            check_factors(n, factors)
@@ -0,0 +1,67 @@
+from collections import Counter
+
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import PrimeGapStats, prime_gap_statistics
+
+
+def brute_force(start, end, interval):
+    # 逐桶直接数：间隙与素数对都记在起点素数所在的桶
+    primes = reference_primes(start, end)
+    prime_set = set(primes)
+    lo = max(start, 2)
+    result = []
+    for b in range(lo, end + 1, interval):
+        hi = min(b + interval - 1, end)
+        own = [p for p in primes if b <= p <= hi]
+        gaps = [(q - p, p) for p, q in zip(primes, primes[1:]) if b <= p <= hi]
+        hist = Counter(g for g, _ in gaps)
+        first = {}
+        for g, p in gaps:
+            first.setdefault(g, p)
+        pairs = {d: [p for p in own if p + d in prime_set] for d in (2, 4, 6)}
+        widest = max(gaps, key=lambda t: (t[0], -t[1]), default=(0, None))
+        result.append({
+            "label": f"{b}-{hi}", "count": len(own), "gaps": hist, "first": first,
+            "max_gap": widest[0], "max_gap_at": widest[1],
+            "twins": len(pairs[2]), "cousins": len(pairs[4]), "sexy": len(pairs[6]),
+            "first_pairs": {d: ps[0] for d, ps in pairs.items() if ps},
+        })
+    return result
+
+
+def summary(bucket):
+    return {"label": bucket.label, "count": bucket.count, "gaps": bucket.gaps, "first": bucket.first,
+            "max_gap": bucket.max_gap, "max_gap_at": bucket.max_gap_at, "twins": bucket.twins,
+            "cousins": bucket.cousins, "sexy": bucket.sexy, "first_pairs": bucket.first_pairs}
+
+
+def test_known_counts():
+    buckets = prime_gap_statistics(0, 1000, 500)
+    assert [b.count for b in buckets] == [95, 73]
+    primes = reference_primes(0, 1000)
+    gaps = [b - a for a, b in zip(primes, primes[1:])]
+    assert max(b.max_gap for b in buckets) == max(gaps) == 20
+    assert sum(b.twins for b in buckets) == gaps.count(2) == 35
+
+
+@pytest.mark.parametrize("start, end, interval", [(0, 3000, 250), (0, 20, 3), (1000, 5000, 97), (3, 7, 1), (2, 10000, 10000)])
+def test_against_brute_force(start, end, interval):
+    assert [summary(b) for b in prime_gap_statistics(start, end, interval)] == brute_force(start, end, interval)
+
+
+@pytest.mark.parametrize("block", [1, 2, 3, 50])
+def test_feed_in_any_block_size(block):
+    primes = reference_primes(0, 3000)
+    stats = PrimeGapStats(0, 3000, 100)
+    for i in range(0, len(primes), block):
+        stats.feed(primes[i:i + block])
+    assert [summary(b) for b in stats.buckets] == brute_force(0, 3000, 100)
+
+
+def test_empty_and_invalid():
+    assert prime_gap_statistics(0, 1, 10) == []
+    assert [b.count for b in prime_gap_statistics(24, 28, 10)] == [0]
+    with pytest.raises(ValueError):
+        prime_gap_statistics(0, 100, 0)
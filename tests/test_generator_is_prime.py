@@ -0,0 +1,26 @@
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import is_prime as reference_is_prime
+
+# 素数生成器 在模块顶层导入 tkinter 与 matplotlib，缺少时跳过
+pytest.importorskip("tkinter")
+pytest.importorskip("matplotlib")
+素数生成器 = pytest.importorskip("素数生成器")
+
+
+def test_bitmap_is_prime_against_trial_division():
+    primes = set(reference_primes(0, 20000))
+    assert [n for n in range(-3, 20001) if 素数生成器.is_prime(n)] == sorted(primes)
+
+
+def test_bitmap_is_prime_edges():
+    limit = 素数生成器.SMALL_PRIME_LIMIT
+    # 位图边界两侧，以及位图之上的 MR 分支
+    for n in list(range(limit - 200, limit + 200)) + [2 ** 31 - 1, 4759123141, 2 ** 61 - 1, 3215031751]:
+        assert 素数生成器.is_prime(n) == reference_is_prime(n)
+
+
+def test_bitmap_is_prime_whole_table():
+    got = [n for n in range(素数生成器.SMALL_PRIME_LIMIT + 1) if 素数生成器.is_prime(n)]
+    assert len(got) == 78498 and got[-1] == 999983
@@ -0,0 +1,60 @@
+from array import array
+
+import pytest
+
+from conftest import reference_primes
+from 素数核心 import BATCH_BPSW_MIN, baillie_psw, is_prime, is_prime_many, prove_prime
+
+PRIMES_10K = reference_primes(0, 10000)
+# 素数、强伪素数与卡迈克尔数，跨过 MR 与 BPSW 的分界
+LARGE = [
+    2 ** 61 - 1, 2 ** 64 - 59, 3215031751, 341550071728321, 561, 1105, 25326001,
+    BATCH_BPSW_MIN - 1, BATCH_BPSW_MIN, BATCH_BPSW_MIN + 2, 2 ** 89 - 1, (2 ** 61 - 1) * (2 ** 31 - 1),
+]
+
+
+def test_is_prime_against_trial_division():
+    assert [n for n in range(10000) if is_prime(n)] == PRIMES_10K
+    assert [is_prime(n) for n in LARGE[:4]] == [True, True, False, False]
+
+
+@pytest.mark.parametrize("container", [list, tuple, iter, lambda v: array("Q", v)])
+def test_is_prime_many_matches_is_prime(container):
+    values = list(range(10000)) + [n for n in LARGE if n < 2 ** 64]
+    result = is_prime_many(container(values))
+    assert isinstance(result, bytearray) and len(result) == len(values)
+    assert list(map(bool, result)) == [is_prime(n) for n in values]
+
+
+def test_is_prime_many_sparse():
+    # 值域稀疏时不筛位图，逐个走 gcd 预筛 + MR/BPSW
+    values = [10 ** 9 + k for k in range(200)]
+    assert list(map(bool, is_prime_many(values))) == [is_prime(n) for n in values]
+    assert is_prime_many([]) == bytearray()
+
+
+def test_is_prime_many_below_two():
+    # 稀疏时不建位图，负数与 0、1 也不能去查位图
+    assert is_prime_many([-7, -2, 0, 1, 2, 10 ** 12 + 39]) == bytearray([0, 0, 0, 0, 1, 1])
+    assert is_prime_many(range(-5, 5)) == bytearray([0, 0, 0, 0, 0, 0, 0, 1, 1, 0])
+
+
+def test_baillie_psw_against_is_prime():
+    for n in list(range(-2, 5000)) + LARGE[:7]:
+        assert baillie_psw(n) == is_prime(n)
+
+
+def test_baillie_psw_large():
+    assert baillie_psw(2 ** 89 - 1) and baillie_psw(2 ** 127 - 1) and baillie_psw(2 ** 521 - 1)
+    assert not baillie_psw((2 ** 61 - 1) * (2 ** 89 - 1))
+    # 对前 12 个素数底的强伪素数；强 Lucas 伪素数 5459·5461
+    assert not baillie_psw(318665857834031151167461)
+    assert not baillie_psw(5459 * 5461)
+
+
+def test_prove_prime():
+    assert prove_prime(2 ** 89 - 1) is True
+    assert prove_prime(2 ** 127 - 1) is True
+    assert prove_prime(2 ** 61 - 1) is True
+    assert prove_prime((2 ** 61 - 1) * (2 ** 67 - 1)) is False
+    assert prove_prime(318665857834031151167461) is False
@@ -0,0 +1,72 @@
+import pytest
+
+import 素数核心
+from conftest import reference_primes
+from 素数核心 import PiTable, count_primes_in_buckets, count_primes_in_ranges, prime_count, prime_count_range
+
+# π(10^k)，k = 0..10
+KNOWN_PI = (0, 4, 25, 168, 1229, 9592, 78498, 664579, 5761455, 50847534, 455052511)
+
+
+def test_prime_count_known_values():
+    for k, pi in enumerate(KNOWN_PI):
+        assert prime_count(10 ** k) == pi
+
+
+def test_prime_count_small_against_trial_division():
+    primes = reference_primes(0, 5000)
+    for x in list(range(-2, 200)) + [997, 1009, 4999, 5000]:
+        assert prime_count(x) == sum(p <= x for p in primes)
+
+
+def test_prime_count_range():
+    assert prime_count_range(1000, 5000) == len(reference_primes(1000, 5000))
+    assert prime_count_range(10 ** 6 - 1000, 10 ** 6 + 1000) == len(reference_primes(10 ** 6 - 1000, 10 ** 6 + 1000))
+    assert prime_count_range(50, 10) == 0
+
+
+def test_pi_table_prefix_width():
+    table = PiTable(10 ** 5)
+    assert table.prefix.typecode == "I"
+    assert [table(n) for n in (1, 2, 10, 100, 10 ** 5)] == [0, 1, 4, 25, 9592]
+
+
+@pytest.mark.parametrize("start, end, interval", [(0, 10 ** 4, 1000), (2, 3 * 10 ** 7, 10 ** 6)])
+def test_count_primes_in_ranges(start, end, interval):
+    # 第一组走分段筛计数，第二组按 π(x) 逐个边界相减
+    ranges, counts = count_primes_in_ranges(start, end, interval)
+    lows = [int(r.split("-")[0]) for r in ranges]
+    highs = [int(r.split("-")[1]) for r in ranges]
+    assert lows[0] == max(start, 2) and highs[-1] == end
+    assert sum(counts) == prime_count(end)
+    assert counts[-1] == prime_count(highs[-1]) - prime_count(lows[-1] - 1)
+
+
+def test_count_primes_in_ranges_builds_pi_table_once(monkeypatch):
+    built = []
+
+    class CountingPiTable(PiTable):
+        def __init__(self, limit):
+            built.append(limit)
+            super().__init__(limit)
+
+    monkeypatch.setattr(素数核心, "PiTable", CountingPiTable)
+    monkeypatch.setattr(素数核心, "_pi_table", None)
+    count_primes_in_ranges(2, 3 * 10 ** 7, 10 ** 6)
+    assert len(built) == 1
+
+
+@pytest.mark.parametrize("start, end, interval", [
+    (0, 10000, 1000), (2, 10000, 7), (17, 5000, 30), (1000, 1000, 5), (29, 31, 1), (0, 100000, 99999),
+])
+def test_count_primes_in_buckets(start, end, interval):
+    primes = reference_primes(start, end)
+    lo = max(start, 2)
+    expected = [0] * ((end - lo) // interval + 1)
+    for p in primes:
+        expected[(p - lo) // interval] += 1
+    assert count_primes_in_buckets(start, end, interval) == expected
+
+
+def test_count_primes_in_buckets_empty():
+    assert count_primes_in_buckets(0, 1, 10) == []
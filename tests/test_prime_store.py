@@ -0,0 +1,178 @@
+import os
+import random
+from unittest import mock
+
+import pytest
+
+import 素数核心
+from 素数核心 import PrimeStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PrimeStore(str(tmp_path / "db.pbin"))
+
+
+def fresh(store):
+    # 丢掉进程内共享状态，模拟重新启动后打开同一个库
+    素数核心._store_states.pop(os.path.abspath(store.filename), None)
+    return PrimeStore(store.filename)
+
+
+def test_append_in_place_and_dedup(store):
+    assert store.append([2, 3, 5, 7]) == 4
+    assert store.append([11, 13], sorted_unique=True) == 2
+    assert not os.path.exists(store.delta_file)
+    assert store.append([13, 7, 17, 3]) == 1
+    assert list(store) == [2, 3, 5, 7, 11, 13, 17]
+    assert len(store) == 7
+
+
+def test_out_of_order_batches_go_to_delta(store):
+    store.append([101, 103])
+    assert store.append([3, 5, 101]) == 2
+    assert os.path.exists(store.delta_file)
+    assert list(store) == [3, 5, 101, 103]
+    assert store.nth(0) == 3 and store.nth(-1) == 103
+    assert store.count(4, 102) == 2
+    assert store.contains(5) and not store.contains(7)
+    assert list(store.range(4, 200)) == [5, 101, 103]
+    assert list(fresh(store)) == [3, 5, 101, 103]
+
+
+def test_view_overlays_delta(store):
+    store.append([7, 11])
+    store.append([2, 3])
+    view = store.view()
+    try:
+        assert list(view) == [2, 3, 7, 11]
+        assert view[1] == 3 and view.nth(2) == 7
+        assert list(view[1:3]) == [3, 7]
+        assert view.index_of(5) == 2
+        assert 11 in view and 5 not in view
+    finally:
+        view.close()
+
+
+def test_compact_merges_delta(store):
+    store.append([7, 11])
+    store.append([2, 3, 13])
+    assert store.compact() is True
+    assert not os.path.exists(store.delta_file)
+    assert not os.path.exists(store.old_delta_file)
+    assert list(fresh(store)) == [2, 3, 7, 11, 13]
+
+
+def test_compact_waits_for_mapped_view_on_windows(store, monkeypatch):
+    monkeypatch.setattr(素数核心, "_MAPS_BLOCK_REPLACE", True)
+    store.append([7, 11])
+    store.append([2, 3])
+    view = store.view()
+    assert store.compact() is False
+    assert os.path.exists(store.delta_file)
+    view.close()
+    assert store.compact() is True
+    assert list(store) == [2, 3, 7, 11]
+
+
+def test_compact_replaces_under_live_view_on_posix(store, monkeypatch):
+    monkeypatch.setattr(素数核心, "_MAPS_BLOCK_REPLACE", False)
+    store.append([7, 11])
+    store.append([2, 3])
+    view = store.view()
+    try:
+        assert store.compact() is True
+        # 旧视图仍读替换前的快照
+        assert list(view) == [2, 3, 7, 11]
+    finally:
+        view.close()
+    assert list(fresh(store)) == [2, 3, 7, 11]
+
+
+def test_no_compactor_thread_while_deferred(store, monkeypatch):
+    monkeypatch.setattr(素数核心, "_MAPS_BLOCK_REPLACE", True)
+    monkeypatch.setattr(PrimeStore, "COMPACT_THRESHOLD", 4)
+    store.append([1000])
+    view = store.view()
+    try:
+        for p in range(2, 20):
+            store.append([p])
+        assert store._state.compactor is None
+    finally:
+        view.close()
+    store.append([23])
+    store._state.compactor.join()
+    assert not os.path.exists(store.delta_file)
+    assert list(store) == list(range(2, 20)) + [23, 1000]
+
+
+def test_delta_runs_stay_logarithmic(store):
+    # 乱序追加的值都进增量区，分段数按二进制计数器保持对数级，查询与逐一插入的结果一致
+    store.append([10 ** 9])
+    values = list(range(1, 3000, 3))
+    random.Random(1).shuffle(values)
+    for i in range(0, len(values), 7):
+        store.append(values[i: i + 7])
+    runs = store._state.delta.runs
+    assert len(runs) <= 2 * len(values).bit_length()
+    expected = sorted(values) + [10 ** 9]
+    assert list(store) == expected
+    assert store.nth(500) == expected[500]
+    assert store.count(100, 2000) == sum(100 <= v <= 2000 for v in values)
+    assert store.contains(4) and not store.contains(5)
+    assert store.append(values[:50]) == 0
+
+
+def test_failed_compact_restores_state(store):
+    store.append([7, 11])
+    store.append([2, 3])
+    replace = os.replace
+
+    def refuse_main(src, dst):
+        if dst == store.filename:
+            raise PermissionError("file is mapped")
+        replace(src, dst)
+
+    with mock.patch.object(素数核心.os, "replace", refuse_main):
+        with pytest.raises(PermissionError):
+            store.compact()
+    assert not os.path.exists(store.filename + ".tmp")
+    assert not os.path.exists(store.old_delta_file)
+    assert list(store) == [2, 3, 7, 11]
+    # 解冻后原地追加重新可用
+    store.append([13])
+    assert store._read_count(open(store.filename, "rb")) == 3
+    assert list(fresh(store)) == [2, 3, 7, 11, 13]
+
+
+def test_recovers_from_crash_between_replace_and_delete(store):
+    # 归并已替换主文件、旧增量文件却还没删掉时崩溃：重启后不能重复计数
+    store.append([7, 11])
+    store.append([2, 3])
+    with open(store.delta_file, "rb") as f:
+        frozen = f.read()
+    store.compact()
+    with open(store.old_delta_file, "wb") as f:
+        f.write(frozen)
+    reopened = fresh(store)
+    assert list(reopened) == [2, 3, 7, 11]
+    assert len(reopened) == 4
+
+
+def test_covered_intervals(store):
+    store.mark_covered(10, 20)
+    store.mark_covered(21, 30)
+    store.mark_covered(50, 60)
+    assert store.covered() == [(10, 30), (50, 60)]
+    assert store.missing(0, 100) == [(0, 9), (31, 49), (61, 100)]
+    assert store.missing(12, 25) == []
+    assert fresh(store).covered() == [(10, 30), (50, 60)]
+
+
+def test_clear(store):
+    store.append([2, 3])
+    store.append([1])
+    store.mark_covered(0, 3)
+    store.clear()
+    assert len(store) == 0 and store.covered() == []
+    assert not os.path.exists(store.filename)
@@ -0,0 +1,72 @@
+from itertools import chain
+
+import pytest
+
+import 素数核心
+from conftest import reference_primes
+from 素数核心 import SegmentCache, cached_sieve_blocks
+
+BLOCK = 64   # 每块覆盖 64·30 = 1920 个整数
+
+
+def small_cache(blocks):
+    return SegmentCache(budget=blocks * (BLOCK + SegmentCache._ENTRY_OVERHEAD), block_bytes=BLOCK)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = small_cache(8)
+    monkeypatch.setattr(素数核心, "segment_cache", cache)
+    return cache
+
+
+def cached(start, end):
+    return list(chain.from_iterable(cached_sieve_blocks(start, end)))
+
+
+@pytest.mark.parametrize("start, end", [(0, 100), (0, 1920 * 3), (1000, 9000), (7, 7), (3840, 3841), (10 ** 6, 10 ** 6 + 5000)])
+def test_cached_blocks_match_reference(cache, start, end):
+    assert cached(start, end) == reference_primes(start, end)
+    # 第二次全部命中，结果不变
+    assert cached(start, end) == reference_primes(start, end)
+
+
+def test_hits_and_misses(cache):
+    cached(0, 1920 * 3 - 1)
+    assert (cache.hits, cache.misses) == (0, 3)
+    cached(1920, 1920 * 2 + 5)
+    assert (cache.hits, cache.misses) == (2, 3)
+    # 部分重叠：已有块命中，只筛缺的块
+    cached(1920 * 2, 1920 * 5)
+    assert (cache.hits, cache.misses) == (3, 6)
+
+
+def test_segment_counts(cache):
+    for lo, block, total in cache.segments(0, 1920 * 4 - 1):
+        assert len(block) == BLOCK
+        first = max(30 * lo, 7)
+        assert total == len(reference_primes(first, 30 * (lo + BLOCK) - 1))
+
+
+def test_budget_evicts_least_recently_used(cache):
+    assert cache.capacity == 8
+    cached(0, 1920 * 8 - 1)
+    cached(0, 10)          # 块 0 变为最近使用
+    cached(1920 * 8, 1920 * 9 - 1)
+    assert len(cache._blocks) == 8
+    assert 0 in cache._blocks and 1 not in cache._blocks
+    cache.resize(3 * (BLOCK + SegmentCache._ENTRY_OVERHEAD))
+    assert list(cache._blocks) == [7, 0, 8]
+
+
+def test_oversized_request_bypasses_cache(cache):
+    assert not cache.holds(0, 1920 * 8)
+    assert cached(0, 1920 * 8) == reference_primes(0, 1920 * 8)
+    assert (cache.hits, cache.misses, len(cache._blocks)) == (0, 0, 0)
+
+
+def test_clear(cache):
+    cached(0, 5000)
+    cache.clear()
+    assert not cache._blocks
+    assert cached(0, 5000) == reference_primes(0, 5000)
@@ -0,0 +1,149 @@
+from array import array
+from itertools import chain
+
+import pytest
+
+import 素数核心
+from conftest import reference_primes
+from 素数核心 import (
+    SIEVE_ENGINES,
+    WheelSieve,
+    choose_sieve_engine,
+    parallel_sieve_blocks,
+    residue_sieve_blocks,
+    segmented_sieve_blocks,
+    segmented_sieve_generator,
+    sieve_blocks,
+    sieve_calibration,
+    sieve_of_eratosthenes,
+)
+
+PRIMES_10K = reference_primes(0, 10000)
+
+
+def flat(blocks):
+    return list(chain.from_iterable(blocks))
+
+
+def test_sieve_of_eratosthenes():
+    assert sieve_of_eratosthenes(10000) == PRIMES_10K
+    for limit in range(-1, 100):
+        assert sieve_of_eratosthenes(limit) == reference_primes(0, limit)
+
+
+def test_wheel_sieve_queries():
+    sieve = WheelSieve(10000)
+    assert sieve.count() == len(PRIMES_10K)
+    assert list(sieve.to_array()) == PRIMES_10K
+    assert sieve.to_array().typecode in ("I", "Q")
+    primes = set(PRIMES_10K)
+    assert [n for n in range(-5, 10010) if n in sieve] == [n for n in range(-5, 10010) if n in primes]
+
+
+@pytest.mark.parametrize("segment_size", [None, 30, 300, 1000, 32768])
+def test_segmented_sieve_generator(segment_size):
+    assert list(segmented_sieve_generator(0, 10000, segment_size)) == PRIMES_10K
+    for a, b in ((0, 1), (2, 2), (3, 5), (7, 7), (8, 10), (29, 31), (9973, 10000), (10 ** 6, 10 ** 6 + 3000)):
+        assert list(segmented_sieve_generator(a, b, segment_size)) == reference_primes(a, b)
+    assert list(segmented_sieve_generator(100, 50, segment_size)) == []
+
+
+def test_segmented_sieve_blocks_are_sorted_chunks():
+    blocks = list(segmented_sieve_blocks(10 ** 8, 10 ** 8 + 20000, segment_size=600))
+    assert len(blocks) > 1 and all(blocks)
+    assert flat(blocks) == reference_primes(10 ** 8, 10 ** 8 + 20000)
+
+
+def test_parallel_sieve_blocks(monkeypatch):
+    # 把并行门槛调低，让小区间也切片交给进程池；结果须按区间顺序拼回
+    monkeypatch.setattr(素数核心, "PARALLEL_MIN_RANGE", 1000)
+    blocks = list(parallel_sieve_blocks(0, 200000, workers=2, segment_size=3000, shard_size=20000))
+    # 子进程按分片返回 array，首块是单独产出的 2、3、5
+    assert blocks[0] == [2, 3, 5] and len(blocks) > 2
+    assert all(isinstance(block, array) for block in blocks[1:])
+    assert flat(blocks) == reference_primes(0, 200000)
+    assert flat(parallel_sieve_blocks(99991, 140000, workers=3, shard_size=9000)) == reference_primes(99991, 140000)
+    assert flat(parallel_sieve_blocks(5, 3, workers=2)) == []
+
+
+@pytest.mark.parametrize("modulus", [1, 2, 7, 10, 12, 30, 31, 60, 97])
+def test_residue_sieve_matches_filter(modulus):
+    for residue in range(modulus):
+        assert flat(residue_sieve_blocks(0, 10000, residue, modulus)) == [p for p in PRIMES_10K if p % modulus == residue]
+
+
+def test_residue_sieve_window_and_special_primes():
+    assert flat(residue_sieve_blocks(5000, 6000, 3, 10, segment_size=300)) == \
+        [p for p in reference_primes(5000, 6000) if p % 10 == 3]
+    # 整除 lcm(模数, 30) 的素数本身：2、3、5、residue 与 residue = 0 时的模数
+    assert flat(residue_sieve_blocks(0, 100, 2, 10)) == [2]
+    assert flat(residue_sieve_blocks(0, 100, 0, 7)) == [7]
+    assert flat(residue_sieve_blocks(0, 100, 11, 22)) == [11]
+
+
+def test_residue_sieve_huge_modulus_is_not_factored():
+    # 分解这个模数要跑很久的 ECM；特殊素数只需检查 residue 与模数本身
+    modulus = (2 ** 89 - 1) * (2 ** 107 - 1)
+    assert flat(residue_sieve_blocks(0, 200, 1, modulus)) == []
+    assert flat(residue_sieve_blocks(0, 200, 97, modulus)) == [97]
+    assert flat(residue_sieve_blocks(0, 2 ** 61, 0, 2 ** 61 - 1)) == [2 ** 61 - 1]
+
+
+def test_residue_sieve_rejects_bad_modulus():
+    with pytest.raises(ValueError):
+        flat(residue_sieve_blocks(0, 100, 1, 0))
+
+
+@pytest.mark.parametrize("engine", sorted(SIEVE_ENGINES))
+@pytest.mark.parametrize("start, end", [(0, 10000), (1000, 10000), (9973, 9973), (0, 1), (24, 28)])
+def test_engines_agree(engine, start, end):
+    assert flat(sieve_blocks(start, end, engine)) == reference_primes(start, end)
+
+
+@pytest.mark.parametrize("engine", [name for name, e in SIEVE_ENGINES.items() if e.limit is not None])
+def test_table_engine_beyond_limit_is_rejected(engine):
+    limit = SIEVE_ENGINES[engine].limit
+    with pytest.raises(ValueError):
+        sieve_blocks(0, limit + 1, engine)
+    assert SIEVE_ENGINES[engine].supports(limit)
+
+
+def test_choose_sieve_engine():
+    table = {"engines": {"wheel": {"1000000": 1.0}, "linear": {"1000000": 0.1}, "atkin": {}}}
+    assert choose_sieve_engine(0, 10 ** 6, table) == "linear"
+    # 整表筛总从 0 开始，高处的窄区间交给分段筛
+    assert choose_sieve_engine(10 ** 7 - 1000, 10 ** 7, table) == "wheel"
+    # 超出整表筛上限时只剩轮式分段筛
+    limit = SIEVE_ENGINES["linear"].limit
+    assert choose_sieve_engine(0, limit + 1, table) == "wheel"
+    assert choose_sieve_engine(0, 10 ** 6, {"engines": {}}) == "wheel"
+
+
+def test_choose_sieve_engine_counts_workers():
+    table = {"engines": {"wheel": {"1000": 1.0}, "classic": {"1000": 0.5}}}
+    end = 素数核心.PARALLEL_MIN_RANGE
+    assert choose_sieve_engine(0, end, table, workers=1) == "classic"
+    assert choose_sieve_engine(0, end, table, workers=4) == "wheel"
+
+
+def test_sieve_calibration_is_cached_per_host(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_calibrate():
+        calls.append(1)
+        return {"version": 素数核心.CALIBRATION_VERSION, "host": 素数核心._host_fingerprint(),
+                "engines": {name: {"1000": 1e-4} for name in SIEVE_ENGINES}}
+
+    monkeypatch.setattr(素数核心, "calibrate_sieves", fake_calibrate)
+    monkeypatch.setattr(素数核心, "_calibration", None)
+    path = str(tmp_path / "calibration.json")
+    table = sieve_calibration(path)
+    assert calls == [1]
+    monkeypatch.setattr(素数核心, "_calibration", None)
+    assert sieve_calibration(path) == table and calls == [1]
+    # 换了机器要重新测
+    table["host"] = {"node": "elsewhere"}
+    素数核心.Checkpoint(path).save(table)
+    monkeypatch.setattr(素数核心, "_calibration", None)
+    sieve_calibration(path)
+    assert calls == [1, 1]
@@ -0,0 +1,2646 @@
+"""
+素数核心 - 算法与存储层
+
+筛法、素性判定、分解、π(x) 与二进制素数库。不依赖 tkinter/matplotlib，
+图形界面、命令行和并行子进程都只需导入本模块。
+"""
+
+import contextlib
+import json
+import os
+import heapq
+import math
+import mmap
+import queue
+import random
+import struct
+import sys
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+from itertools import accumulate, chain, compress, islice
+from operator import add, sub
+
+# from 素数核心 import * 只导出这些名字，不带出 os、json、mmap 等标准库模块
+__all__ = [
+    "PRIME_DB_JSON", "PRIME_DB_ND", "PRIME_DB_BIN", "CACHE_DIR", "BASE_PRIME_FILE", "MR_BASES_64",
+    "MR_BASE_TIERS", "SMALL_PRIME_LIMIT", "CHUNK_SIZE", "WRITE_BUFFER_SIZE", "WRITER_QUEUE_SIZE",
+    "EXPORT_FORMATS", "GZIP_LEVEL", "ZSTD_LEVEL", "NPY_HEADER_SIZE", "DB_PAGE_SIZE", "PREVIEW_SIZE",
+    "CHECKPOINT_INTERVAL", "WHEEL_RESIDUES", "WHEEL_SEGMENT_BYTES", "PARALLEL_MIN_RANGE",
+    "PARALLEL_SHARD_SIZE", "SEGMENT_CACHE_BLOCK", "SEGMENT_CACHE_BUDGET", "CPU_CACHE_DIR",
+    "FALLBACK_CACHE_SIZES", "CLASSIC_SIEVE_LIMIT", "ATKIN_SIEVE_LIMIT", "LINEAR_SIEVE_LIMIT",
+    "SIEVE_CALIBRATION_FILE", "CALIBRATION_VERSION", "CALIBRATION_SIZES", "CALIBRATION_MAX_SECONDS",
+    "CALIBRATION_REPEATS", "BASE_PRIME_MIN_LIMIT", "BASE_PRIME_MAX_LIMIT", "SIEVE_MAX", "TRIAL_DIVISION_LIMIT",
+    "SPF_FACTOR_LIMIT", "SPF_BLOCK_SIZE", "FACTOR_SEGMENT_SIZE", "RHO_MAX_STEPS", "ECM_SCHEDULE",
+    "ECM_B2_RATIO", "INTERACTIVE_ECM_SCHEDULE", "PROOF_ECM_SCHEDULE", "PROOF_MAX_WITNESS",
+    "BATCH_GCD_PRIME_LIMIT", "BATCH_SIEVE_LIMIT", "BATCH_BPSW_MIN", "PRIME_COUNT_DIRECT_LIMIT",
+    "PHI_TINY_PRIMES", "SIEVE_ENGINES", "GAP_MAGIC",
+    "miller_rabin", "WheelSieve", "sieve_of_eratosthenes", "BasePrimeTable", "base_primes", "cpu_cache_sizes",
+    "default_segment_bytes", "SegmentCache", "segment_cache", "cached_sieve_blocks", "segmented_sieve_blocks",
+    "parallel_sieve_blocks", "count_primes_in_buckets", "segmented_sieve_generator", "classic_sieve_blocks",
+    "atkin_sieve_blocks", "linear_sieve", "linear_sieve_blocks", "SieveEngine", "calibrate_sieves",
+    "sieve_calibration", "choose_sieve_engine", "sieve_blocks", "residue_sieve_blocks", "PiTable",
+    "prime_count", "prime_count_range", "is_prime", "baillie_psw", "is_prime_many", "pollard_brent",
+    "ecm_factor", "SpfTable", "factor_range", "prime_factors", "prove_prime", "encode_lines", "BulkWriter",
+    "save_primes_ndappend", "save_primes_json", "iter_gap_file", "export_primes", "PrimeView", "PrimeStore",
+    "save_primes_store", "import_legacy_db", "load_prime_db", "Checkpoint", "GenerationJob",
+    "count_primes_in_ranges", "GapBucket", "PrimeGapStats", "prime_gap_statistics",
+]
+
+PRIME_DB_JSON = "primes_db.json"
+PRIME_DB_ND = "primes_db.ndjson"
+PRIME_DB_BIN = "primes_db.pbin"
+# 每用户缓存目录（基素数表、筛法校准结果），不写进当前工作目录；可用环境变量 PRIME_CACHE_DIR 指定
+CACHE_DIR = os.environ.get("PRIME_CACHE_DIR") or os.path.join(
+    (os.environ.get("LOCALAPPDATA") if os.name == "nt" else os.environ.get("XDG_CACHE_HOME"))
+    or os.path.join(os.path.expanduser("~"), ".cache"), "primes")
+BASE_PRIME_FILE = os.path.join(CACHE_DIR, "primes_base.bin")
+MR_BASES_64 = [2, 325, 9375, 28178, 450775, 9780504, 1795265022]
+# 按上界选用的确定性 Miller-Rabin 基：n < 上界时这组基即可给出确定结果
+MR_BASE_TIERS = (
+    (2047, (2,)),
+    (1_373_653, (2, 3)),
+    (25_326_001, (2, 3, 5)),
+    (4_759_123_141, (2, 7, 61)),
+    (2_152_302_898_747, (2, 3, 5, 7, 11)),
+    (3_474_749_660_383, (2, 3, 5, 7, 11, 13)),
+    (2 ** 64, tuple(MR_BASES_64)),
+)
+# is_prime 查表范围
+SMALL_PRIME_LIMIT = 10 ** 6
+CHUNK_SIZE = 5000
+# 写出阶段：文件缓冲区字节数；后台写线程最多积压的批数
+WRITE_BUFFER_SIZE = 1 << 20
+WRITER_QUEUE_SIZE = 8
+# 导出格式（按扩展名推断）；gzip/zstd 压缩级别；.npy 头部定长字节数
+EXPORT_FORMATS = {".txt": "txt", ".gz": "gz", ".zst": "zst", ".pgap": "gaps", ".npy": "npy"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+NPY_HEADER_SIZE = 128
+DB_PAGE_SIZE = 1000
+# 生成任务随事件上报的预览素数个数；两次写断点之间的最短间隔（秒）
+PREVIEW_SIZE = 200
+CHECKPOINT_INTERVAL = 1.0
+
+# 模 30 轮：与 2·3·5 互素的 8 个剩余，位图中每字节对应 30 个整数里的这 8 个候选
+WHEEL_RESIDUES = (1, 7, 11, 13, 17, 19, 23, 29)
+WHEEL_SEGMENT_BYTES = 1 << 16
+# 超过该区间长度才启用多进程；单个子任务的区间长度上限
+PARALLEL_MIN_RANGE = 50_000_000
+PARALLEL_SHARD_SIZE = 30 << 20
+# 筛结果缓存：每块的位图字节数（一块覆盖 30 倍的整数）；默认内存预算
+SEGMENT_CACHE_BLOCK = 1 << 15
+SEGMENT_CACHE_BUDGET = 64 << 20
+# 分段筛的段长按每核 L2 缓存取：缓存信息所在的 sysfs 目录；读不到时假设的各级缓存字节数
+CPU_CACHE_DIR = "/sys/devices/system/cpu/cpu0/cache"
+FALLBACK_CACHE_SIZES = {1: 32 << 10, 2: 1 << 20}
+# 筛法引擎：整表筛的终止值上限（受内存与纯 Python 循环速度限制）
+CLASSIC_SIEVE_LIMIT = 10 ** 8
+ATKIN_SIEVE_LIMIT = 10 ** 7
+LINEAR_SIEVE_LIMIT = 10 ** 7
+# 引擎校准：结果文件与格式版本；测速的区间规模；预计单次测量超过该秒数的更大规模不再测；短测量的重复次数
+SIEVE_CALIBRATION_FILE = os.path.join(CACHE_DIR, "sieve_calibration.json")
+CALIBRATION_VERSION = 2
+CALIBRATION_SIZES = (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+CALIBRATION_MAX_SECONDS = 0.5
+CALIBRATION_REPEATS = 3
+# 基素数表：最小构建上限、可缓存上限（uint32 存储）；试除分解时查表的上限
+BASE_PRIME_MIN_LIMIT = 1 << 16
+BASE_PRIME_MAX_LIMIT = 2 ** 32 - 1
+# 基素数表最多到 uint32，分段筛能处理的整数因此不超过 2^64 - 1（也是素数库 uint64 记录的上限）
+SIEVE_MAX = (BASE_PRIME_MAX_LIMIT + 1) ** 2 - 1
+TRIAL_DIVISION_LIMIT = 1 << 16
+# 最小素因子表：prime_factors 直接查表的上限；SpfTable 分块填表的块长；factor_range 每段的整数个数
+SPF_FACTOR_LIMIT = 10 ** 6
+SPF_BLOCK_SIZE = 1 << 20
+FACTOR_SEGMENT_SIZE = 1 << 16
+# 分解：Pollard–Brent 的最大步数；ECM 的 (B1, 曲线数) 计划，B2 = ECM_B2_RATIO * B1
+RHO_MAX_STEPS = 1 << 18
+ECM_SCHEDULE = ((2000, 25), (11000, 90), (50000, 300), (250000, 700))
+ECM_B2_RATIO = 100
+# 界面里交互分解只跑前两档（最坏约 20 秒，可找出 20 位左右的因子），完整计划最坏要近一小时
+INTERACTIVE_ECM_SCHEDULE = ECM_SCHEDULE[:2]
+# 严格证明：分解 n-1 时 ECM 只跑第一档；Pocklington 每个素因子最多尝试的底数个数
+PROOF_ECM_SCHEDULE = ECM_SCHEDULE[:1]
+PROOF_MAX_WITNESS = 100
+# 批量素性判定：共享 gcd 预筛用到的小素数上界；值域足够密时整体筛表查询的上界
+BATCH_GCD_PRIME_LIMIT = 211
+BATCH_SIEVE_LIMIT = 10 ** 7
+# 批量判定从这里起改用 BPSW：再往上确定性 MR 至少要 5 个基
+BATCH_BPSW_MIN = 4_759_123_141
+# π(x)：不超过该值直接查表；φ 递归用前 7 个素数的周期表截断
+PRIME_COUNT_DIRECT_LIMIT = 10 ** 6
+PHI_TINY_PRIMES = 7
+_WHEEL_INDEX = {r: k for k, r in enumerate(WHEEL_RESIDUES)}
+_BIT_TABLES = [bytes((b >> k) & 1 for b in range(256)) for k in range(8)]
+_CLEAR_TABLES = [bytes(b & ~(1 << k) & 0xFF for b in range(256)) for k in range(8)]
+_POP8 = bytes(bin(b).count("1") for b in range(256))
+_CLEAR_MASKS = [~(1 << k) & 0xFF for k in range(8)]
+_UPTO_MASKS = [sum(1 << k for k, r in enumerate(WHEEL_RESIDUES) if r <= t) for t in range(30)]
+
+
+def miller_rabin(n, bases=MR_BASES_64):
+    if n < 2:
+        return False
+    small_primes = (2, 3, 5, 7, 11, 13, 17, 19, 23)
+    for p in small_primes:
+        if n == p:
+            return True
+        if n % p == 0:
+            return False
+
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        s += 1
+        d //= 2
+
+    def check(a, s, d, n):
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            return True
+        for _ in range(s - 1):
+            x = (x * x) % n
+            if x == n - 1:
+                return True
+        return False
+
+    for a in bases:
+        if a % n == 0:
+            continue
+        if not check(a, s, d, n):
+            return False
+    return True
+
+
+def _popcount(buf):
+    return bin(int.from_bytes(buf, "little")).count("1")
+
+
+def _wheel_offsets(p):
+    # p 的倍数 p*m（m >= p 且与 30 互素）按 m mod 30 分成 8 条链，
+    # 每条链在位图中步长为 p 字节、位号固定，返回各链的 (起始字节, 位号)
+    offsets = []
+    for r in WHEEL_RESIDUES:
+        n = p * (p + (r - p) % 30)
+        offsets.append((n // 30, _WHEEL_INDEX[n % 30]))
+    return offsets
+
+
+def _mark_wheel_segment(segment, lo, sieving_primes, offsets):
+    # segment 覆盖位图字节 [lo, lo + len)，即整数 [30*lo, 30*(lo + len))
+    n = len(segment)
+    hi_num = 30 * (lo + n)
+    for p, offs in zip(sieving_primes, offsets):
+        if p * p >= hi_num:
+            break
+        for i, bit in offs:
+            s = i - lo if i >= lo else (i - lo) % p
+            if s < n:
+                segment[s::p] = segment[s::p].translate(_CLEAR_TABLES[bit])
+
+
+def _wheel_extract(buf, base):
+    # 把位图片段还原为有序素数列表，base 为片段首字节对应的整数 30*lo
+    end = base + 30 * len(buf)
+    primes = []
+    for k, r in enumerate(WHEEL_RESIDUES):
+        primes.extend(compress(range(base + r, end, 30), buf.translate(_BIT_TABLES[k])))
+    primes.sort()
+    return primes
+
+
+def _array_typecode(limit):
+    return "I" if limit < 2 ** 32 and array("I").itemsize >= 4 else "Q"
+
+
+class WheelSieve:
+    """模 30 轮位图埃氏筛：每 30 个整数只占 1 字节，内存约为逐字节筛的 1/30。"""
+
+    def __init__(self, limit):
+        self.limit = max(limit, 0)
+        nbytes = self.limit // 30 + 1
+        root = math.isqrt(self.limit)
+        sieving = [p for p in (WheelSieve(root) if root >= 7 else ()) if p >= 7]
+        offsets = [_wheel_offsets(p) for p in sieving]
+        bits = bytearray()
+        for lo in range(0, nbytes, WHEEL_SEGMENT_BYTES):
+            segment = bytearray(b"\xff") * min(WHEEL_SEGMENT_BYTES, nbytes - lo)
+            _mark_wheel_segment(segment, lo, sieving, offsets)
+            bits += segment
+        bits[0] &= 0xFE
+        tail = self.limit % 30
+        for k, r in enumerate(WHEEL_RESIDUES):
+            if r > tail:
+                bits[-1] &= ~(1 << k) & 0xFF
+        self.bits = bits
+        self._count = None
+
+    def _small(self):
+        return [p for p in (2, 3, 5) if p <= self.limit]
+
+    def __iter__(self):
+        yield from self._small()
+        for lo in range(0, len(self.bits), WHEEL_SEGMENT_BYTES):
+            yield from _wheel_extract(self.bits[lo: lo + WHEEL_SEGMENT_BYTES], 30 * lo)
+
+    def __contains__(self, n):
+        if n < 0 or n > self.limit:
+            return False
+        if n in (2, 3, 5):
+            return True
+        k = _WHEEL_INDEX.get(n % 30)
+        return k is not None and bool(self.bits[n // 30] >> k & 1)
+
+    def count(self):
+        if self._count is None:
+            self._count = len(self._small()) + _popcount(self.bits)
+        return self._count
+
+    def to_array(self, typecode=None):
+        primes = array(typecode or _array_typecode(self.limit), self._small())
+        for lo in range(0, len(self.bits), WHEEL_SEGMENT_BYTES):
+            primes.extend(_wheel_extract(self.bits[lo: lo + WHEEL_SEGMENT_BYTES], 30 * lo))
+        return primes
+
+
+def sieve_of_eratosthenes(limit):
+    if limit < 2:
+        return []
+    return list(WheelSieve(limit))
+
+
+class BasePrimeTable:
+    """进程内共享的基素数表：只增不减，磁盘文件以内存映射方式在多次运行间复用。"""
+
+    # 头部：魔数、字节序、筛到的上限、素数个数；个数与正文长度不符（截断、并发写坏）时重建
+    _MAGIC = b"PBA2"
+    _HEADER = struct.Struct("<4s4sQQ")
+    _ORDER = b"<" if sys.byteorder == "little" else b">"
+
+    def __init__(self, filename=BASE_PRIME_FILE):
+        self.filename = filename
+        self.limit = -1
+        self.primes = memoryview(array("I"))
+        self._mmap = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.filename, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        magic, order, limit, count = self._HEADER.unpack_from(mm) if len(mm) >= self._HEADER.size else (b"", b"", 0, 0)
+        body = len(mm) - self._HEADER.size
+        if magic != self._MAGIC or order.rstrip(b"\0") != self._ORDER or body != 4 * count:
+            mm.close()
+            return
+        self._mmap = mm
+        self.primes = memoryview(mm)[self._HEADER.size:].cast("I")
+        self.limit = limit
+
+    def _grow(self, limit):
+        limit = min(max(limit, 2 * self.limit, BASE_PRIME_MIN_LIMIT), BASE_PRIME_MAX_LIMIT)
+        primes = WheelSieve(limit).to_array("I")
+        self.primes = memoryview(primes)
+        self.limit = limit
+        # Windows 上不能替换仍被映射的文件：先关闭旧映射，调用方还持有旧表的切片时这次不写盘，留到下次扩表
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                return
+            self._mmap = None
+        import tempfile  # 只在扩表写盘时需要
+        # 每次写入用独立的临时文件，几个进程同时扩表时各自原子替换，不会交错写坏同一个文件
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.filename) + ".", dir=directory)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._HEADER.pack(self._MAGIC, self._ORDER, limit, len(primes)))
+                f.write(primes.tobytes())
+            os.replace(tmp, self.filename)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            return
+        # 换成映射前先确认文件没有被别的进程换成更小的表
+        self._load()
+        if self.limit < limit:
+            self.primes, self.limit = memoryview(primes), limit
+
+    def get(self, limit):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if limit > self.limit:
+                if limit > BASE_PRIME_MAX_LIMIT:
+                    raise ValueError(f"基素数上限超出 uint32 范围: {limit}")
+                self._grow(limit)
+            primes = self.primes
+        return primes[:bisect_right(primes, limit)]
+
+
+_base_table = BasePrimeTable()
+
+
+def base_primes(limit):
+    return _base_table.get(limit)
+
+
+_cache_sizes = None
+
+
+def _cpu_count_in(cpu_list):
+    # sysfs 的 CPU 列表格式，如 "0-3,8-11"
+    count = 0
+    for part in cpu_list.strip().split(","):
+        a, _, b = part.partition("-")
+        count += int(b or a) - int(a) + 1
+    return count
+
+
+def cpu_cache_sizes():
+    # 每核可用的数据缓存字节数 {级别: 字节}，多核共享的缓存按共享核数平分；读不到的级别用假设值
+    global _cache_sizes
+    if _cache_sizes is None:
+        sizes = dict(FALLBACK_CACHE_SIZES)
+        try:
+            names = sorted(os.listdir(CPU_CACHE_DIR))
+        except OSError:
+            names = []
+        for name in names:
+            if not name.startswith("index"):
+                continue
+            fields = {}
+            for field in ("level", "type", "size", "shared_cpu_list"):
+                with contextlib.suppress(OSError):
+                    with open(os.path.join(CPU_CACHE_DIR, name, field), encoding="ascii") as f:
+                        fields[field] = f.read().strip()
+            text = fields.get("size", "").upper()
+            if fields.get("type") == "Instruction" or not text or "level" not in fields:
+                continue
+            try:
+                size = int(text.rstrip("KMG")) << {"K": 10, "M": 20, "G": 30}.get(text[-1], 0)
+                shared = _cpu_count_in(fields["shared_cpu_list"]) if "shared_cpu_list" in fields else 1
+                sizes[int(fields["level"])] = size // max(shared, 1)
+            except ValueError:
+                continue
+        _cache_sizes = sizes
+    return _cache_sizes
+
+
+def default_segment_bytes():
+    # 段长取每核 L2：小素数的跨步划除留在缓存里，段又足够长，能摊薄每个素数每段一次的解释器开销
+    return cpu_cache_sizes()[2]
+
+
+def _segment_bytes(segment_size):
+    # segment_size 以整数个数计，位图每字节 30 个整数；None 表示按 CPU 缓存自动取
+    return max(1, segment_size // 30) if segment_size else default_segment_bytes()
+
+
+def _bucket_fill(sieving, offsets, first, last, seg_bytes):
+    # 大素数的每条链按下一次命中的段号挂进桶；桶里交替存 (字节位置 << 3 | 位号, p)
+    buckets = {}
+    for p, offs in zip(sieving, offsets):
+        for i, bit in offs:
+            pos = i if i >= first else first + (i - first) % p
+            if pos <= last:
+                buckets.setdefault((pos - first) // seg_bytes, []).extend((pos << 3 | bit, p))
+    return buckets
+
+
+def _bucket_mark(segment, lo, hits, buckets, first, last, seg_bytes):
+    # 划掉本段挂着的命中，并把每条链挂到它的下一个命中段
+    it = iter(hits)
+    for code, p in zip(it, it):
+        pos = code >> 3
+        segment[pos - lo] &= _CLEAR_MASKS[code & 7]
+        pos += p
+        if pos <= last:
+            k = (pos - first) // seg_bytes
+            bucket = buckets.get(k)
+            if bucket is None:
+                buckets[k] = [pos << 3 | code & 7, p]
+            else:
+                bucket += (pos << 3 | code & 7, p)
+
+
+def _wheel_segments(start, end, sieving, offsets, seg_bytes):
+    # 产出 (起始字节 lo, 已筛位图段)，覆盖 [start, end] 所在的全部字节。
+    # 区间跨多段时，不小于段长的基素数每条链每段至多命中一次，改用桶筛：
+    # 只在真正命中的段里处理它们，而不是每段都把所有大素数走一遍
+    lo = first = start // 30
+    last = end // 30
+    split = bisect_left(sieving, seg_bytes) if last - first >= seg_bytes else len(sieving)
+    buckets = _bucket_fill(sieving[split:], offsets[split:], first, last, seg_bytes)
+    sieving, offsets = sieving[:split], offsets[:split]
+    while lo <= last:
+        segment = bytearray(b"\xff") * min(seg_bytes, last - lo + 1)
+        _mark_wheel_segment(segment, lo, sieving, offsets)
+        hits = buckets.pop((lo - first) // seg_bytes, None)
+        if hits:
+            _bucket_mark(segment, lo, hits, buckets, first, last, seg_bytes)
+        if lo == 0:
+            segment[0] &= 0xFE
+        yield lo, segment
+        lo += len(segment)
+
+
+def _wheel_range_blocks(start, end, sieving, offsets, seg_bytes):
+    return _extract_range(_wheel_segments(start, end, sieving, offsets, seg_bytes), start, end)
+
+
+def _extract_range(segments, start, end):
+    # 把 (lo, 位图段, ...) 序列还原为 [start, end] 内的有序素数块。
+    # 标记用的段按 L2 取得很长，提取时按 WHEEL_SEGMENT_BYTES 切片，每块素数列表的内存与取消的间隔都有上限
+    for lo, segment, *_ in segments:
+        for off in range(0, len(segment), WHEEL_SEGMENT_BYTES):
+            primes = _wheel_extract(segment[off: off + WHEEL_SEGMENT_BYTES], 30 * (lo + off))
+            if primes and (primes[0] < start or primes[-1] > end):
+                primes = primes[bisect_left(primes, start): bisect_right(primes, end)]
+            if primes:
+                yield primes
+
+
+def _wheel_count(segment, lo, a, b):
+    # 段内整数 [a, b] 对应位的计数，首尾字节按剩余掩码截取
+    ia, ib = a // 30 - lo, b // 30 - lo
+    first = 0xFF & ~_UPTO_MASKS[a % 30 - 1] if a % 30 else 0xFF
+    last = _UPTO_MASKS[b % 30]
+    if ia == ib:
+        return _POP8[segment[ia] & first & last]
+    return _POP8[segment[ia] & first] + _popcount(segment[ia + 1: ib]) + _POP8[segment[ib] & last]
+
+
+def _sieving_primes(end):
+    return base_primes(math.isqrt(end))[3:]
+
+
+class SegmentCache:
+    """按块对齐的筛结果 LRU 缓存：键为块号，值为该块的轮位图与素数个数，总字节数受预算约束。"""
+
+    _ENTRY_OVERHEAD = 200
+
+    def __init__(self, budget=SEGMENT_CACHE_BUDGET, block_bytes=SEGMENT_CACHE_BLOCK):
+        self.block_bytes = block_bytes
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self.budget // (self.block_bytes + self._ENTRY_OVERHEAD)
+
+    def resize(self, budget):
+        with self._lock:
+            self.budget = budget
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+    def _evict(self):
+        while len(self._blocks) > self.capacity:
+            self._blocks.popitem(last=False)
+
+    def holds(self, start, end):
+        size = self.block_bytes
+        return end // 30 // size - start // 30 // size < self.capacity
+
+    def segments(self, start, end):
+        # 产出覆盖 [start, end] 的 (lo, 位图, 块内素数个数)，lo 为块首字节号。命中的块直接给出，
+        # 连续缺失的块一起筛（筛用素数与偏移只算一次）；请求超过容量时直接筛且不写入缓存，避免冲掉常用块
+        size = self.block_bytes
+        first, last = start // 30 // size, end // 30 // size
+        if not self.holds(start, end):
+            sieving = _sieving_primes(end)
+            offsets = [_wheel_offsets(p) for p in sieving]
+            for lo, segment in _wheel_segments(start, end, sieving, offsets, default_segment_bytes()):
+                yield lo, segment, _popcount(segment)
+            return
+        k = first
+        while k <= last:
+            with self._lock:
+                entry = self._blocks.get(k)
+                if entry is not None:
+                    self._blocks.move_to_end(k)
+                    self.hits += 1
+            if entry is not None:
+                yield (k * size,) + entry
+                k += 1
+                continue
+            miss_end = k
+            with self._lock:
+                while miss_end < last and miss_end + 1 not in self._blocks:
+                    miss_end += 1
+            hi = 30 * size * (miss_end + 1) - 1
+            sieving = _sieving_primes(hi)
+            offsets = [_wheel_offsets(p) for p in sieving]
+            seg_bytes = size * max(1, default_segment_bytes() // size)
+            for lo, segment in _wheel_segments(30 * size * k, hi, sieving, offsets, seg_bytes):
+                for off in range(0, len(segment), size):
+                    block = bytes(segment[off: off + size])
+                    entry = (block, _popcount(block))
+                    with self._lock:
+                        self.misses += 1
+                        self._blocks[(lo + off) // size] = entry
+                        self._evict()
+                    yield (lo + off,) + entry
+            k = miss_end + 1
+
+
+segment_cache = SegmentCache()
+
+
+def cached_sieve_blocks(start, end):
+    # 与 segmented_sieve_blocks 相同的输出，但位图段取自 segment_cache
+    if end < 2 or start > end:
+        return
+    start = max(start, 2)
+    small = [p for p in (2, 3, 5) if start <= p <= end]
+    if small:
+        yield small
+    yield from _extract_range(segment_cache.segments(start, end), start, end)
+
+
+def segmented_sieve_blocks(start, end, segment_size=None):
+    # 按段产出 [start, end] 内素数的有序列表；段内标记与提取均为整片操作
+    if end < 2 or start > end:
+        return
+    start = max(start, 2)
+    small = [p for p in (2, 3, 5) if start <= p <= end]
+    if small:
+        yield small
+    sieving = _sieving_primes(end)
+    offsets = [_wheel_offsets(p) for p in sieving]
+    yield from _wheel_range_blocks(start, end, sieving, offsets, _segment_bytes(segment_size))
+
+
+_worker_sieving = None
+_worker_offsets = None
+
+
+def _init_sieve_worker(sieving):
+    # 每个子进程只接收并预处理一次基素数
+    global _worker_sieving, _worker_offsets
+    _worker_sieving = sieving
+    _worker_offsets = [_wheel_offsets(p) for p in sieving]
+
+
+def _sieve_shard(start, end, seg_bytes):
+    primes = array(_array_typecode(end))
+    for block in _wheel_range_blocks(start, end, _worker_sieving, _worker_offsets, seg_bytes):
+        primes.extend(block)
+    return primes
+
+
+def parallel_sieve_blocks(start, end, workers=None, segment_size=None, shard_size=None):
+    # 多进程分段筛：区间按段对齐切片，子进程并行筛，结果按区间顺序产出
+    if end < 2 or start > end:
+        return
+    workers = workers or os.cpu_count() or 1
+    start = max(start, 2)
+    if workers <= 1 or end - start < PARALLEL_MIN_RANGE:
+        yield from segmented_sieve_blocks(start, end, segment_size)
+        return
+    small = [p for p in (2, 3, 5) if start <= p <= end]
+    if small:
+        yield small
+    seg_bytes = _segment_bytes(segment_size)
+    if shard_size is None:
+        shard_size = min(PARALLEL_SHARD_SIZE, (end - start) // (workers * 4) + 1)
+    shard = 30 * seg_bytes * max(1, shard_size // (30 * seg_bytes))
+    sieving = array("I", _sieving_primes(end).tobytes())
+    pending = deque()
+    from concurrent.futures import ProcessPoolExecutor  # 只在真正并行时导入，保持模块导入轻量
+    with ProcessPoolExecutor(workers, initializer=_init_sieve_worker, initargs=(sieving,)) as executor:
+        try:
+            low = start
+            while low <= end:
+                high = min((low // shard + 1) * shard - 1, end)
+                pending.append(executor.submit(_sieve_shard, low, high, seg_bytes))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+                low = high + 1
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def count_primes_in_buckets(start, end, interval):
+    # 只计数不取素数：位图段取自 segment_cache，直接按桶做位计数；整块落在桶内时用缓存的个数
+    start = max(start, 2)
+    if end < start:
+        return []
+    counts = [0] * ((end - start) // interval + 1)
+    for p in (2, 3, 5):
+        if start <= p <= end:
+            counts[(p - start) // interval] += 1
+    for lo, segment, total in segment_cache.segments(start, end):
+        a = max(30 * lo, start)
+        hi = min(30 * (lo + len(segment)) - 1, end)
+        idx = (a - start) // interval
+        while a <= hi:
+            b = min(start + (idx + 1) * interval - 1, hi)
+            if a == 30 * lo and b == 30 * (lo + len(segment)) - 1:
+                counts[idx] += total
+            else:
+                counts[idx] += _wheel_count(segment, lo, a, b)
+            idx += 1
+            a = b + 1
+    return counts
+
+
+def segmented_sieve_generator(start, end, segment_size=None):
+    for block in segmented_sieve_blocks(start, end, segment_size):
+        yield from block
+
+
+def _table_blocks(primes, start):
+    # 整表筛的结果按 CHUNK_SIZE 切块产出 start 以后的部分
+    for i in range(bisect_left(primes, start), len(primes), CHUNK_SIZE):
+        yield primes[i: i + CHUNK_SIZE]
+
+
+def classic_sieve_blocks(start, end):
+    # 只存奇数的逐字节埃氏筛，筛 [0, end] 整张表；第 i 字节对应 2i+1
+    if end < 2 or start > end:
+        return
+    start = max(start, 2)
+    half = bytearray(b"\x01") * ((end + 1) // 2)
+    half[0] = 0
+    for i in range(1, (math.isqrt(end) - 1) // 2 + 1):
+        if half[i]:
+            p = 2 * i + 1
+            first = p * p // 2
+            half[first::p] = bytes((len(half) - 1 - first) // p + 1)
+    if start <= 2:
+        yield [2]
+    for lo in range(start // 2, len(half), WHEEL_SEGMENT_BYTES):
+        hi = min(lo + WHEEL_SEGMENT_BYTES, len(half))
+        primes = list(compress(range(2 * lo + 1, 2 * hi, 2), half[lo:hi]))
+        if primes:
+            yield primes
+
+
+def atkin_sieve_blocks(start, end):
+    # Atkin 筛：按三种二次型的模 12 条件翻转标记，再划掉素数平方的倍数
+    if end < 2 or start > end:
+        return
+    start = max(start, 2)
+    flags = bytearray(end + 1)
+    for x in range(1, math.isqrt(end // 4) + 1):
+        base = 4 * x * x
+        for y in range(1, math.isqrt(end - base) + 1 if end > base else 1, 2):
+            n = base + y * y
+            if n % 12 in (1, 5):
+                flags[n] ^= 1
+    for x in range(1, math.isqrt(end // 3) + 1, 2):
+        base = 3 * x * x
+        for y in range(2, math.isqrt(end - base) + 1 if end > base else 1, 2):
+            n = base + y * y
+            if n % 12 == 7:
+                flags[n] ^= 1
+    for x in range(2, math.isqrt(end // 2) + 2):
+        base = 3 * x * x
+        for y in range(x - 1, 0, -2):
+            n = base - y * y
+            if n > end:
+                break
+            if n % 12 == 11:
+                flags[n] ^= 1
+    for r in range(5, math.isqrt(end) + 1):
+        if flags[r]:
+            sq = r * r
+            flags[sq::sq] = bytes(end // sq)
+    yield from _table_blocks([p for p in (2, 3) if p <= end] + list(compress(range(end + 1), flags)), start)
+
+
+def linear_sieve(limit):
+    # 线性筛（欧拉筛）：每个合数只被它的最小素因子划掉一次，返回 (素数表, 最小素因子表 spf)
+    spf = array(_array_typecode(limit), [0]) * (max(limit, 1) + 1)
+    primes = []
+    for i in range(2, limit + 1):
+        least = spf[i]
+        if not least:
+            spf[i] = least = i
+            primes.append(i)
+        bound = limit // i
+        for p in primes:
+            if p > least or p > bound:
+                break
+            spf[i * p] = p
+    return primes, spf
+
+
+def linear_sieve_blocks(start, end):
+    if end < 2 or start > end:
+        return
+    yield from _table_blocks(linear_sieve(end)[0], max(start, 2))
+
+
+class SieveEngine:
+    """筛法引擎的统一接口：blocks(start, end) 按块产出有序素数；整表筛只能处理 limit 以内的终止值。"""
+
+    def __init__(self, name, func, limit=None, segmented=False):
+        self.name = name
+        self.func = func
+        self.limit = limit
+        self.segmented = segmented
+
+    def supports(self, end):
+        return self.limit is None or end <= self.limit
+
+    def work(self, start, end):
+        # 估算工作量（需要筛的整数个数）：整表筛总是从 0 筛起
+        if self.segmented:
+            return end - max(start, 0) + 1 + math.isqrt(end)
+        return end + 1
+
+    def blocks(self, start, end, segment_size=None, workers=None):
+        # 整表筛要分配 end 大小的表，超出 limit 时直接拒绝，不要等到 MemoryError
+        if not self.supports(end):
+            raise ValueError(f"{self.name} 引擎只能筛到 {self.limit}，终止值 {end} 超出范围；请改用 wheel 引擎")
+        if self.segmented:
+            return self.func(start, end, workers=workers, segment_size=segment_size)
+        return self.func(start, end)
+
+
+SIEVE_ENGINES = {
+    "wheel": SieveEngine("wheel", parallel_sieve_blocks, segmented=True),
+    "classic": SieveEngine("classic", classic_sieve_blocks, CLASSIC_SIEVE_LIMIT),
+    "atkin": SieveEngine("atkin", atkin_sieve_blocks, ATKIN_SIEVE_LIMIT),
+    "linear": SieveEngine("linear", linear_sieve_blocks, LINEAR_SIEVE_LIMIT),
+}
+
+
+def _host_fingerprint():
+    import platform  # 只在校准时需要
+    return {"node": platform.node(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "python": platform.python_version()}
+
+
+def _time_engine(engine, n):
+    # 耗时很短的测量重复几次取最快，减少计时抖动
+    best = None
+    for _ in range(CALIBRATION_REPEATS):
+        begin = time.perf_counter()
+        for _ in engine.blocks(0, n, workers=1):
+            pass
+        seconds = time.perf_counter() - begin
+        best = seconds if best is None else min(best, seconds)
+        if seconds > CALIBRATION_MAX_SECONDS / 10:
+            break
+    return best
+
+
+def calibrate_sieves(sizes=CALIBRATION_SIZES):
+    # 在本机对每个引擎按规模测速，记录每种规模的最快耗时；
+    # 某规模按线性外推会超过 CALIBRATION_MAX_SECONDS 时，更大的规模不再测。
+    # 段长不在这里测：从 0 开始的测速区间基素数很少，测不出高处区间真正需要的段长，段长按 CPU 缓存定
+    engines = {}
+    for name, engine in SIEVE_ENGINES.items():
+        tiers = {}
+        last = None
+        for n in sizes:
+            if not engine.supports(n):
+                break
+            if last is not None and last[1] * n / last[0] > CALIBRATION_MAX_SECONDS:
+                break
+            seconds = _time_engine(engine, n)
+            tiers[str(n)] = seconds
+            last = (n, seconds)
+        engines[name] = tiers
+    return {"version": CALIBRATION_VERSION, "host": _host_fingerprint(), "engines": engines}
+
+
+_calibration = None
+_calibration_lock = threading.Lock()
+
+
+def sieve_calibration(filename=SIEVE_CALIBRATION_FILE, recalibrate=False):
+    # 进程内只校准一次；结果存在 filename 中，换了机器（或引擎列表、文件格式变了）才重新测
+    global _calibration
+    with _calibration_lock:
+        if _calibration is not None and not recalibrate:
+            return _calibration
+        table = None
+        if not recalibrate:
+            try:
+                with open(filename, encoding="utf-8") as f:
+                    table = json.load(f)
+                if (table.get("version") != CALIBRATION_VERSION or table.get("host") != _host_fingerprint()
+                        or set(table.get("engines", ())) != set(SIEVE_ENGINES)):
+                    table = None
+            except (OSError, ValueError, AttributeError):
+                table = None
+        if table is None:
+            table = calibrate_sieves()
+            with contextlib.suppress(OSError):
+                os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+                Checkpoint(filename).save(table)
+        _calibration = table
+        return table
+
+
+def choose_sieve_engine(start, end, calibration=None, workers=None):
+    # 按校准结果预测各引擎在 [start, end] 上的耗时，返回最快的引擎名；
+    # 用工作量不超过它的最大已测规模的速率线性外推，轮式分段筛在多进程区间内按进程数折算
+    table = calibration or sieve_calibration()
+    best = None
+    for name, engine in SIEVE_ENGINES.items():
+        tiers = sorted((int(n), seconds) for n, seconds in table["engines"].get(name, {}).items())
+        if not tiers or not engine.supports(end):
+            continue
+        work = engine.work(start, end)
+        n, seconds = tiers[max(0, bisect_right([t[0] for t in tiers], work) - 1)]
+        predicted = seconds * work / n
+        if engine.segmented and end - start >= PARALLEL_MIN_RANGE:
+            predicted /= workers or os.cpu_count() or 1
+        if best is None or predicted < best[0]:
+            best = (predicted, name)
+    return "wheel" if best is None else best[1]
+
+
+def sieve_blocks(start, end, engine=None, segment_size=None, workers=None):
+    # 按块产出 [start, end] 内的素数。engine 为 None 时按本机校准结果自动选择；
+    # 选中轮式分段筛时，只有不会走多进程的区间（短于 PARALLEL_MIN_RANGE 或指定单进程）才经过 segment_cache；
+    # 指定的引擎处理不了 end 时抛出 ValueError
+    if engine is None:
+        engine = choose_sieve_engine(start, end, workers=workers)
+        single = end - start < PARALLEL_MIN_RANGE or workers == 1
+        if engine == "wheel" and segment_size is None and single and segment_cache.holds(max(start, 0), max(end, 0)):
+            return cached_sieve_blocks(start, end)
+    return SIEVE_ENGINES[engine].blocks(start, end, segment_size, workers)
+
+
+def residue_sieve_blocks(start, end, residue, modulus, segment_size=None):
+    # 按窗口产出 [start, end] 内 ≡ residue (mod modulus) 的素数，只筛这一条等差数列：
+    # 把它拆成模 L = lcm(modulus, 30) 的子数列 c + L·t（只留与 L 互素的 c，至多 8 条），每项一字节；
+    # 基素数 p 在子数列里的倍数下标仍是步长为 p 的等差数列，可整片划去。工作量约为全筛的 条数/8
+    if modulus <= 0:
+        raise ValueError("模数必须为正")
+    residue %= modulus
+    start = max(start, 2)
+    if end < start:
+        return
+    period = modulus * 30 // math.gcd(modulus, 30)
+    classes = [c for c in range(residue, period, modulus) if math.gcd(c, period) == 1]
+    # 整除 L 的素数不在任何子数列里，单独检查：只可能是 2、3、5 或 modulus 的素因子 p，
+    # 而 p ≤ modulus 且 p ≡ residue 只能是 p = residue（或 residue = 0 时 p = modulus），不必分解 modulus
+    special = sorted(p for p in {2, 3, 5, residue, modulus}
+                     if start <= p <= end and period % p == 0 and p % modulus == residue and is_prime(p))
+    if special:
+        yield special
+    if not classes:
+        return
+    sieving = [p for p in _sieving_primes(end) if period % p]
+    class_roots = []
+    for c in classes:
+        # 子数列 c 中被 p 整除的项：t ≡ -c·L⁻¹ (mod p)
+        class_roots.append([-c * pow(period, -1, p) % p for p in sieving])
+    width = max(1, _segment_bytes(segment_size) // len(classes))
+    lo = start
+    while lo <= end:
+        hi = min(lo + period * width - 1, end)
+        primes = []
+        for c, roots in zip(classes, class_roots):
+            t_lo, t_hi = -((c - lo) // period), (hi - c) // period
+            if t_hi < t_lo:
+                continue
+            n = t_hi - t_lo + 1
+            first, last = c + period * t_lo, c + period * t_hi
+            segment = bytearray(b"\x01") * n
+            for p, root in zip(sieving, roots):
+                square = p * p
+                if square > last:
+                    break
+                t = t_lo if square <= first else -((c - square) // period)
+                i = t - t_lo + (root - t) % p
+                if i < n:
+                    segment[i::p] = bytes((n - 1 - i) // p + 1)
+            primes.extend(compress(range(first, last + 1, period), segment))
+        if primes:
+            if len(classes) > 1:
+                primes.sort()
+            yield primes
+        lo = hi + 1
+
+
+class PiTable:
+    """π(n) 查表：轮位图加每字节前缀计数，n <= limit 时 O(1)。"""
+
+    def __init__(self, limit):
+        self.limit = max(limit, 7)
+        self.bits = WheelSieve(self.limit).bits
+        counts = self.bits.translate(_POP8)
+        # 前缀计数最大为 π(limit)，按它而不是按 limit 选元素宽度：limit 过了 2^32 计数仍放得进 uint32
+        self.prefix = array(_array_typecode(sum(counts)), accumulate(counts, initial=0))
+
+    def __call__(self, n):
+        if n < 7:
+            return (0, 0, 1, 2, 2, 3, 3)[n] if n >= 0 else 0
+        b = n // 30
+        return 3 + self.prefix[b] + _POP8[self.bits[b] & _UPTO_MASKS[n % 30]]
+
+
+_pi_table = None
+_pi_lock = threading.Lock()
+_phi_tiny = None
+
+
+def _pi_table_limit(x):
+    # prime_count(x) 需要的 π 表上限
+    return x if x <= PRIME_COUNT_DIRECT_LIMIT else int(x ** (2 / 3)) + 2
+
+
+def _pi_table_for(limit):
+    global _pi_table
+    with _pi_lock:
+        if _pi_table is None or _pi_table.limit < limit:
+            _pi_table = PiTable(limit)
+        return _pi_table
+
+
+def _phi_tiny_table():
+    # φ(n, k) 对 n 以 p1·…·pk 为周期：返回 (周期, 一个周期内的前缀计数表, φ(周期))
+    global _phi_tiny
+    if _phi_tiny is None:
+        primes = list(base_primes(100))[:PHI_TINY_PRIMES]
+        period = math.prod(primes)
+        flags = bytearray(b"\x01") * period
+        for p in primes:
+            flags[::p] = bytes(len(range(0, period, p)))
+        table = array("I", accumulate(flags))
+        _phi_tiny = (period, table, table[-1])
+    return _phi_tiny
+
+
+def prime_count(x):
+    # Meissel 公式：π(x) = φ(x, a) + a - 1 - P2(x, a)，a = π(x^(1/3))。
+    # φ 递归在 y < p² 时直接查 π 表，在 y < p³ 时用 φ(y, i) = π(y) - i + 1 + P2(y, i) 截断，
+    # 因此 π 表只需覆盖 x^(2/3)，整体远低于逐个枚举素数的线性代价。
+    if x < 2:
+        return 0
+    if x <= PRIME_COUNT_DIRECT_LIMIT:
+        return _pi_table_for(x)(x)
+    table = _pi_table_for(_pi_table_limit(x))
+    pi, bits, prefix, ylim = table, table.bits, table.prefix, table.limit
+    primes = base_primes(math.isqrt(x))
+    a = 0
+    while primes[a] ** 3 <= x:
+        a += 1
+    period, tiny, tiny_total = _phi_tiny_table()
+    k = PHI_TINY_PRIMES
+    cache = {}
+
+    def phi(y, a):
+        # 不被前 a 个素数整除的 1..y 的个数（a > k）
+        key = (y, a)
+        if y < 1 << 24 and key in cache:
+            return cache[key]
+        r = (y // period) * tiny_total + tiny[y % period]
+        for i in range(k, a):
+            p = primes[i]
+            z = y // p
+            if z < p:
+                # 余下各项 φ(z, i) 均为 1（p <= y 时）
+                hi = min(a, pi(y))
+                if hi > i:
+                    r -= hi - i
+                break
+            if z < p * p:
+                zb = z // 30
+                r -= 3 + prefix[zb] + _POP8[bits[zb] & _UPTO_MASKS[z % 30]] - i + 1
+            elif z < p * p * p and z <= ylim:
+                zb = z // 30
+                v = 3 + prefix[zb] + _POP8[bits[zb] & _UPTO_MASKS[z % 30]] - i + 1
+                for j in range(i, bisect_right(primes, math.isqrt(z))):
+                    w = z // primes[j]
+                    wb = w // 30
+                    v += 3 + prefix[wb] + _POP8[bits[wb] & _UPTO_MASKS[w % 30]] - j
+                r -= v
+            else:
+                r -= phi(z, i)
+        if y < 1 << 24:
+            cache[key] = r
+        return r
+
+    total = phi(x, a) + a - 1
+    for i in range(a, bisect_right(primes, math.isqrt(x))):
+        total -= pi(x // primes[i]) - i
+    return total
+
+
+def prime_count_range(a, b):
+    if b < 2 or a > b:
+        return 0
+    return prime_count(b) - prime_count(max(a, 2) - 1)
+
+
+_small_sieve = None
+
+
+def is_prime(n):
+    # n <= 1e6 直接查 mod-30 轮位图（约 33KB，首次查询时构建）；
+    # 64 位以内按大小选最少的确定性基，32 位只需 {2, 7, 61}；更大的数用 BPSW
+    global _small_sieve
+    if n < 2:
+        return False
+    if n <= SMALL_PRIME_LIMIT:
+        if _small_sieve is None:
+            _small_sieve = WheelSieve(SMALL_PRIME_LIMIT)
+        return n in _small_sieve
+    if n >= 2 ** 64:
+        return baillie_psw(n)
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23):
+        if n % p == 0:
+            return False
+    return _mr_deterministic(n)
+
+
+def _strong_probable_prime(n, d, s, a):
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _mr_deterministic(n):
+    # 奇数 n < 2^64 且无小因子：按上界选最少的确定性基
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for bound, bases in MR_BASE_TIERS:
+        if n < bound:
+            break
+    for a in bases:
+        a %= n
+        if a and not _strong_probable_prime(n, d, s, a):
+            return False
+    return True
+
+
+_batch_filter = None
+
+
+def _batch_prime_filter():
+    global _batch_filter
+    if _batch_filter is None:
+        small = base_primes(BATCH_GCD_PRIME_LIMIT)
+        _batch_filter = (frozenset(small), math.prod(small), small[-1] ** 2)
+    return _batch_filter
+
+
+def _jacobi(a, n):
+    # Jacobi 符号 (a/n)，n 为正奇数
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas(n):
+    # 强 Lucas 检验（Selfridge 参数 P=1, Q=(1-D)/4）。只推进 V 序列与 Q^k，
+    # 每位 3 次大数乘模；U_d ≡ 0 由 D·U_d = 2V_{d+1} - V_d 判定
+    if math.isqrt(n) ** 2 == n:
+        return False
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    v, w, qk = 2, 1, 1
+    for bit in bin(d)[2:]:
+        if bit == "1":
+            v = (v * w - qk) % n
+            w = (w * w - 2 * qk * Q) % n
+            qk = qk * qk * Q % n
+        else:
+            w = (v * w - qk) % n
+            v = (v * v - 2 * qk) % n
+            qk = qk * qk % n
+    if v == 0 or (2 * w - v) % n == 0:
+        return True
+    for _ in range(s - 1):
+        v = (v * v - 2 * qk) % n
+        if v == 0:
+            return True
+        qk = qk * qk % n
+    return False
+
+
+def baillie_psw(n):
+    # Baillie–PSW：小素数 gcd 预筛 → 以 2 为底的强伪素数检验（一次 pow）→ 强 Lucas。
+    # 2^64 以下已验证无反例；更大的 n 目前也没有已知反例
+    if n < 2:
+        return False
+    small, primorial, small_square = _batch_prime_filter()
+    if math.gcd(n, primorial) != 1:
+        return n in small
+    if n < small_square:
+        return True
+    return _bpsw_odd(n)
+
+
+def _bpsw_odd(n):
+    # 已过小素数预筛的 n：以 2 为底的强伪素数检验 + 强 Lucas
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    return _strong_probable_prime(n, d >> s, s, 2) and _strong_lucas(n)
+
+
+def is_prime_many(values):
+    # 批量素性判定，返回与输入等长的 bytearray（1 为素数）。
+    # 值域足够密时整体筛一次再查位图；其余先与小素数乘积做一次 gcd 排除，
+    # 剩下的数在确定性 MR 只需不超过 3 个基时用 MR，更大的用 BPSW（1 次 pow + 强 Lucas，比 5~7 个基快）
+    if not isinstance(values, (list, tuple, array)):
+        values = list(values)
+    result = bytearray(len(values))
+    if not values:
+        return result
+    small, primorial, small_square = _batch_prime_filter()
+    bound = min(max(values), BATCH_SIEVE_LIMIT)
+    lookup = WheelSieve(bound) if len(values) * 32 >= bound else None
+    if lookup is None:
+        bound = -1
+    for i, n in enumerate(values):
+        if n < 2:
+            continue
+        elif n <= bound:
+            result[i] = n in lookup
+        elif math.gcd(n, primorial) != 1:
+            result[i] = n in small
+        elif n < small_square:
+            result[i] = 1
+        elif n < BATCH_BPSW_MIN:
+            result[i] = _mr_deterministic(n)
+        else:
+            result[i] = _bpsw_odd(n)
+    return result
+
+
+def _iroot(n, k):
+    # floor(n ** (1/k))，牛顿迭代，适用于任意大整数
+    if n < 2:
+        return n
+    x = 1 << -(-n.bit_length() // k)
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
+
+def _perfect_power(n):
+    for k in base_primes(n.bit_length()):
+        r = _iroot(n, k)
+        if r ** k == n:
+            return r, k
+    return None
+
+
+def pollard_brent(n, c=1, max_steps=RHO_MAX_STEPS, batch=128):
+    # Brent 改进的 Pollard rho：|x - y| 累乘后每 batch 步才做一次 gcd；失败返回 None
+    if n % 2 == 0:
+        return 2
+    y, r, q, g = 2, 1, 1, 1
+    x = ys = y
+    while g == 1:
+        x = y
+        for _ in range(r):
+            y = (y * y + c) % n
+        k = 0
+        while k < r and g == 1:
+            ys = y
+            for _ in range(min(batch, r - k)):
+                y = (y * y + c) % n
+                q = q * abs(x - y) % n
+            g = math.gcd(q, n)
+            k += batch
+        r *= 2
+        if r > max_steps:
+            return None
+    if g == n:
+        # 批量 gcd 跨过了因子，从批首逐步回溯
+        g = 1
+        while g == 1:
+            ys = (ys * ys + c) % n
+            g = math.gcd(abs(x - ys), n)
+    return g if g != n else None
+
+
+def _ecm_double(x, z, a24, n):
+    s = (x + z) * (x + z) % n
+    d = (x - z) * (x - z) % n
+    t = s - d
+    return s * d % n, t * (d + a24 * t) % n
+
+
+def _ecm_add(xp, zp, xq, zq, xd, zd, n):
+    # Montgomery 差分加法：已知 P - Q = D
+    u = (xp - zp) * (xq + zq)
+    v = (xp + zp) * (xq - zq)
+    return zd * (u + v) * (u + v) % n, xd * (u - v) * (u - v) % n
+
+
+def _ecm_mul(k, x, z, a24, n):
+    # Montgomery 阶梯计算 k·P
+    if k == 1:
+        return x, z
+    x1, z1 = x, z
+    x2, z2 = _ecm_double(x, z, a24, n)
+    for bit in bin(k)[3:]:
+        if bit == "1":
+            x1, z1 = _ecm_add(x2, z2, x1, z1, x, z, n)
+            x2, z2 = _ecm_double(x2, z2, a24, n)
+        else:
+            x2, z2 = _ecm_add(x1, z1, x2, z2, x, z, n)
+            x1, z1 = _ecm_double(x1, z1, a24, n)
+    return x1, z1
+
+
+def _ecm_curve(n, sigma, b1, b2):
+    # Suyama 参数化的一条 Montgomery 曲线，阶段一 B1 + 标准延拓阶段二 B2
+    u = (sigma * sigma - 5) % n
+    v = 4 * sigma % n
+    x, z = pow(u, 3, n), pow(v, 3, n)
+    den = 16 * pow(u, 3, n) * v % n
+    g = math.gcd(den, n)
+    if g != 1:
+        return g if g != n else None
+    a24 = pow(v - u, 3, n) * (3 * u + v) * pow(den, -1, n) % n
+    for p in base_primes(b1):
+        pk = p
+        while pk * p <= b1:
+            pk *= p
+        x, z = _ecm_mul(pk, x, z, a24, n)
+    g = math.gcd(z, n)
+    if g != 1:
+        return g if g != n else None
+    # 阶段二：q = k·W ± j（gcd(j, W) = 1），巨步点 k·W·Q 与小步点 j·Q 的 X/Z 交叉积累乘
+    w = 210
+    half = w // 2
+    baby = [(x, z), _ecm_double(x, z, a24, n)]
+    for _ in range(half - 2):
+        (xa, za), (xb, zb) = baby[-2], baby[-1]
+        baby.append(_ecm_add(xb, zb, x, z, xa, za, n))
+    baby = [baby[j - 1] for j in range(1, half + 1) if math.gcd(j, w) == 1]
+    k = max(2, b1 // w)
+    xw, zw = _ecm_mul(w, x, z, a24, n)
+    xp, zp = _ecm_mul((k - 1) * w, x, z, a24, n)
+    xt, zt = _ecm_mul(k * w, x, z, a24, n)
+    acc = 1
+    while k * w - half <= b2:
+        for xb, zb in baby:
+            acc = acc * (xt * zb - xb * zt) % n
+        xn, zn = _ecm_add(xt, zt, xw, zw, xp, zp, n)
+        xp, zp, xt, zt = xt, zt, xn, zn
+        k += 1
+    g = math.gcd(acc, n)
+    return g if 1 < g < n else None
+
+
+def ecm_factor(n, schedule=ECM_SCHEDULE, seed=None):
+    # 椭圆曲线分解：按计划逐步加大 B1；找不到因子返回 None
+    rng = random.Random(n if seed is None else seed)
+    for b1, curves in schedule:
+        for _ in range(curves):
+            d = _ecm_curve(n, rng.randrange(6, n - 1), b1, b1 * ECM_B2_RATIO)
+            if d:
+                return d
+    return None
+
+
+class SpfTable:
+    """最小素因子表：合数 n 记最小素因子，素数与 0、1 记 0；因子不超过 √limit，故 limit < 2^32 时每项只占 2 字节。"""
+
+    def __init__(self, limit):
+        self.limit = max(limit, 1)
+        root = math.isqrt(self.limit)
+        typecode = "H" if root < 1 << 16 else "I"
+        spf = array(typecode, [0]) * (self.limit + 1)
+        primes = base_primes(root)
+        # 分块填表，块内按素数从大到小整片赋值，较小的素因子最后写入并覆盖较大的
+        for lo in range(0, self.limit + 1, SPF_BLOCK_SIZE):
+            hi = min(lo + SPF_BLOCK_SIZE, self.limit + 1)
+            for p in reversed(primes[:bisect_right(primes, math.isqrt(hi - 1))]):
+                first = max(p * p, (lo + p - 1) // p * p)
+                if first < hi:
+                    spf[first:hi:p] = array(typecode, [p]) * ((hi - 1 - first) // p + 1)
+        self.spf = spf
+
+    def factor(self, n):
+        factors = []
+        spf = self.spf
+        while n > 1:
+            p = spf[n] or n
+            factors.append(p)
+            n //= p
+        return factors
+
+
+_spf_table = None
+_spf_lock = threading.Lock()
+
+
+def _spf_table_for(limit):
+    global _spf_table
+    with _spf_lock:
+        if _spf_table is None or _spf_table.limit < limit:
+            _spf_table = SpfTable(limit)
+        return _spf_table
+
+
+def factor_range(a, b, segment_size=FACTOR_SEGMENT_SIZE):
+    # 按段产出 [a, b] 内每个整数的 (n, 升序质因子列表)。段内对每个 p <= √b 只沿 p, p², p³… 的倍数走，
+    # 每次命中除掉一个 p，剩下大于 1 的余数就是唯一一个大于 √n 的素因子；总代价约 (b - a)·ln ln b
+    if a <= 0 <= b:
+        yield 0, []
+    a = max(a, 1)
+    for lo in range(a, b + 1, segment_size):
+        hi = min(lo + segment_size - 1, b)
+        rest = list(range(lo, hi + 1))
+        factors = [[] for _ in rest]
+        size = len(rest)
+        for p in base_primes(math.isqrt(hi)):
+            q = p
+            while q <= hi:
+                for i in range(-lo % q, size, q):
+                    rest[i] //= p
+                    factors[i].append(p)
+                q *= p
+        for i, r in enumerate(rest):
+            if r > 1:
+                factors[i].append(r)
+        yield from zip(range(lo, hi + 1), factors)
+
+
+def _factor_cofactor(n, factors, schedule=ECM_SCHEDULE):
+    if n == 1:
+        return
+    if is_prime(n):
+        factors.append(n)
+        return
+    power = _perfect_power(n)
+    if power:
+        base, k = power
+        sub = []
+        _factor_cofactor(base, sub, schedule)
+        factors.extend(sub * k)
+        return
+    d = None
+    for c in (1, 3, 5):
+        d = pollard_brent(n, c)
+        if d:
+            break
+    if not d:
+        d = ecm_factor(n, schedule)
+    if not d:
+        raise RuntimeError(f"无法在限定的 ECM 计划内分解 {n}")
+    _factor_cofactor(d, factors, schedule)
+    _factor_cofactor(n // d, factors, schedule)
+
+
+def prime_factors(n, schedule=ECM_SCHEDULE):
+    # 分层分解：小数查最小素因子表 → 缓存小素数表试除 → Pollard–Brent rho → ECM，合数判定用 Miller-Rabin
+    factors = []
+    if n <= 1:
+        return factors
+    if n <= SPF_FACTOR_LIMIT:
+        return _spf_table_for(SPF_FACTOR_LIMIT).factor(n)
+    limit = min(math.isqrt(n), TRIAL_DIVISION_LIMIT)
+    for p in base_primes(limit):
+        if p * p > n:
+            break
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+    if n > 1:
+        if n < (limit + 1) ** 2:
+            factors.append(n)
+        else:
+            _factor_cofactor(n, factors, schedule)
+    return sorted(factors)
+
+
+def _split_for_proof(m):
+    # 给证明用的 n-1 找一个真因子：完全幂 → rho → 少量 ECM，失败返回 None
+    power = _perfect_power(m)
+    if power:
+        return power[0]
+    for c in (1, 3, 5):
+        d = pollard_brent(m, c)
+        if d:
+            return d
+    return ecm_factor(m, PROOF_ECM_SCHEDULE)
+
+
+def prove_prime(n):
+    # 严格判定：2^64 以下确定性 MR 本身即证明；更大的 n 先过 BPSW，
+    # 再做 Pocklington n-1 证明：n-1 = F·R，F 完全分解且 F² > n，
+    # F 的每个素因子 q 都有底 a 使 a^(n-1) ≡ 1、gcd(a^((n-1)/q) - 1, n) = 1。
+    # F 中超过 64 位的素因子递归证明；n-1 分解不到 √n 时抛 RuntimeError
+    if n < 2 ** 64:
+        return is_prime(n)
+    if not baillie_psw(n):
+        return False
+    m = n - 1
+    qs = []
+    for p in base_primes(TRIAL_DIVISION_LIMIT):
+        if m % p == 0:
+            qs.append(p)
+            while m % p == 0:
+                m //= p
+    F = (n - 1) // m
+    pending = [m] if m > 1 else []
+    while F * F <= n:
+        r = pending.pop()
+        if baillie_psw(r):
+            if not prove_prime(r):
+                raise RuntimeError(f"{r} 通过 BPSW 但证明失败")
+            qs.append(r)
+            F *= r
+            continue
+        d = _split_for_proof(r)
+        if not d:
+            raise RuntimeError(f"n-1 已分解部分不足 √n，无法完成证明（剩余 {r.bit_length()} 位合数）")
+        pending += [d, r // d]
+        pending.sort()
+    for q in set(qs):
+        e = (n - 1) // q
+        for a in range(2, PROOF_MAX_WITNESS + 2):
+            x = pow(a, e, n)
+            if pow(x, q, n) != 1:
+                return False
+            g = math.gcd(x - 1, n)
+            if g == 1:
+                break
+            if g != n:
+                return False
+        else:
+            raise RuntimeError(f"未找到素因子 {q} 的 Pocklington 见证")
+    return True
+
+
+def encode_lines(values):
+    # 一批整数整段编码为换行分隔的文本
+    return ("\n".join(map(str, values)) + "\n").encode("ascii")
+
+
+def _batched(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class BulkWriter:
+    """写出阶段：每批数据整段编码后一次写出。threaded=True 时在独立线程里写，
+    队列有界，筛得比写得快时生产者会被挡住，内存不会无限增长。"""
+
+    def __init__(self, write, encode=None, threaded=False, max_pending=WRITER_QUEUE_SIZE):
+        self._write = write
+        self._encode = encode
+        self._error = None
+        self._queue = None
+        if threaded:
+            self._queue = queue.Queue(max_pending)
+            self._thread = threading.Thread(target=self._drain, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            try:
+                self.close()
+            except Exception:
+                pass
+
+    def _do(self, kind, payload):
+        if kind == "call":
+            payload()
+        else:
+            self._write(self._encode(payload) if self._encode else payload)
+
+    def _drain(self):
+        # 出错后继续取空队列，生产者不会卡在 put 上；错误在下一次 write/flush/close 时抛出
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    self._do(*item)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def _submit(self, kind, payload):
+        self._check()
+        if self._queue is None:
+            self._do(kind, payload)
+        else:
+            self._queue.put((kind, payload))
+
+    def write(self, block):
+        # 交出后调用方不应再修改 block
+        self._submit("data", block)
+
+    def after(self, callback):
+        # 之前交出的数据全部写出后再执行 callback（用于写断点）
+        self._submit("call", callback)
+
+    def flush(self):
+        if self._queue is not None:
+            self._queue.join()
+        self._check()
+
+    def close(self):
+        if self._queue is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._check()
+
+
+def save_primes_ndappend(primes_iterable, filename=PRIME_DB_ND):
+    with open(filename, "ab", buffering=WRITE_BUFFER_SIZE) as f, BulkWriter(f.write, encode_lines) as writer:
+        for batch in _batched(primes_iterable, CHUNK_SIZE):
+            writer.write(batch)
+
+
+def save_primes_json(primes_list, filename=PRIME_DB_JSON):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(primes_list, f, ensure_ascii=False)
+
+
+def _pack_u64(values):
+    data = array("Q", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack_u64(raw):
+    data = array("Q")
+    data.frombytes(raw)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+def _unique_sorted(iterable):
+    last = None
+    for v in iterable:
+        if v != last:
+            yield v
+            last = v
+
+
+GAP_MAGIC = b"PGAP0001"
+
+
+def _encode_gaps(block, prev):
+    # 差分编码：3 之后相邻素数差都是偶数，存差的一半；每个数按 LEB128 变长写出，
+    # 差 < 256 时只占 1 字节。返回 (字节串, 块内最后一个素数)
+    if prev < 3:
+        halves = []
+        for p in block:
+            halves.append(p - prev if prev < 3 else (p - prev) >> 1)
+            prev = p
+    else:
+        halves = [(b - a) >> 1 for a, b in zip(chain((prev,), block), block)]
+        prev = block[-1]
+    if max(halves) < 0x80:
+        return bytes(halves), prev
+    out = bytearray()
+    for h in halves:
+        while h >= 0x80:
+            out.append(h & 0x7F | 0x80)
+            h >>= 7
+        out.append(h)
+    return bytes(out), prev
+
+
+def iter_gap_file(filename):
+    # 逐个读出 .pgap 文件中的素数，内存占用与文件大小无关
+    with open(filename, "rb") as f:
+        if f.read(len(GAP_MAGIC)) != GAP_MAGIC:
+            raise ValueError(f"{filename} 不是差分编码的素数文件")
+        prev = shift = acc = 0
+        while True:
+            chunk = f.read(WRITE_BUFFER_SIZE)
+            if not chunk:
+                return
+            for byte in chunk:
+                acc |= (byte & 0x7F) << shift
+                if byte & 0x80:
+                    shift += 7
+                    continue
+                prev += acc if prev < 3 else acc << 1
+                yield prev
+                shift = acc = 0
+
+
+def _npy_header(count):
+    # NumPy .npy v1.0 头：定长，写完数据后按实际个数原地重写
+    text = "{'descr': '<u8', 'fortran_order': False, 'shape': (%d,), }" % count
+    text = text.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+def export_primes(blocks, filename, fmt=None):
+    # 流式导出升序素数块：txt/gz/zst 为逐行文本，gaps 为差分变长编码，npy 为 uint64 数组。
+    # 每次只持有一个块；filename 为 "-" 时写到标准输出（npy 需要回写头部，只能写文件）。返回导出个数
+    fmt = fmt or EXPORT_FORMATS.get(os.path.splitext(filename)[1].lower(), "txt")
+    if fmt not in EXPORT_FORMATS.values():
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    if fmt == "npy" and filename == "-":
+        raise ValueError("npy 格式需要写入文件")
+    count = 0
+    with contextlib.ExitStack() as stack:
+        if filename == "-":
+            raw = sys.stdout.buffer
+        else:
+            raw = stack.enter_context(open(filename, "wb", buffering=WRITE_BUFFER_SIZE))
+        write, encode = raw.write, encode_lines
+        if fmt == "gz":
+            import gzip
+            write = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL)).write
+        elif fmt == "zst":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("导出 .zst 需要安装 zstandard：pip install zstandard") from None
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw)
+            stack.callback(compressor.flush, zstandard.FLUSH_FRAME)
+            write = compressor.write
+        elif fmt == "npy":
+            raw.write(_npy_header(0))
+            encode = _pack_u64
+        elif fmt == "gaps":
+            raw.write(GAP_MAGIC)
+            prev = 0
+
+            def encode(block):
+                nonlocal prev
+                data, prev = _encode_gaps(block, prev)
+                return data
+        with BulkWriter(write, encode) as writer:
+            for block in blocks:
+                if len(block):
+                    writer.write(block)
+                    count += len(block)
+        if fmt == "npy":
+            raw.flush()
+            raw.seek(0)
+            raw.write(_npy_header(count))
+    return count
+
+
+class PrimeView:
+    """素数库的只读视图：主文件部分直接作用于内存映射缓冲区，尚未归并的少量增量值以有序列表叠加。"""
+
+    def __init__(self, values, mm=None, extra=()):
+        self._values = values
+        self._mmap = mm
+        self._extra = extra
+
+    def __len__(self):
+        return len(self._values) + len(self._extra)
+
+    def _split(self, k):
+        # 合并序列的前 k 个元素 = 主文件前 i 个 + 增量前 j 个
+        if k >= len(self):
+            return len(self._values), len(self._extra)
+        j = bisect_left(self._extra, self.nth(k))
+        return k - j, j
+
+    def __getitem__(self, i):
+        if not self._extra:
+            if isinstance(i, slice):
+                return PrimeView(self._values[i], self._mmap)
+            return self._values[i]
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                return list(self)[i]
+            (a, b), (c, d) = self._split(lo), self._split(max(lo, hi))
+            return PrimeView(self._values[a:c], self._mmap, self._extra[b:d])
+        return self.nth(i)
+
+    def __iter__(self):
+        if not self._extra:
+            return iter(self._values)
+        return heapq.merge(self._values, self._extra)
+
+    def __contains__(self, p):
+        return self.contains(p)
+
+    def contains(self, p):
+        return _sorted_contains(self._values, p) or _sorted_contains(self._extra, p)
+
+    def count(self, a, b):
+        if a > b:
+            return 0
+        return (bisect_right(self._values, b) - bisect_left(self._values, a)
+                + bisect_right(self._extra, b) - bisect_left(self._extra, a))
+
+    def nth(self, k):
+        if not self._extra:
+            return self._values[k]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("PrimeView index out of range")
+        return _merged_nth(self._values.__getitem__, len(self._values), self._extra, k)
+
+    def range(self, a, b):
+        values, extra = self._values, self._extra
+        return PrimeView(values[bisect_left(values, a): bisect_right(values, b)], self._mmap,
+                         extra[bisect_left(extra, a): bisect_right(extra, b)])
+
+    def index_of(self, x):
+        # 第一个 >= x 的素数下标，用于按数值跳转
+        return bisect_left(self._values, x) + bisect_left(self._extra, x)
+
+    def close(self):
+        self._values.release()
+        self._values = memoryview(array("Q"))
+        self._extra = ()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 仍有切片视图引用该映射，留给垃圾回收
+                pass
+            self._mmap = None
+
+
+def _merge_runs(a, b):
+    # 两个有序段合并：值域不相交（顺序追加的常见情形）时直接拼接，否则交给 timsort，它能识别两段有序并线性归并
+    if a[-1] < b[0]:
+        return a + b
+    if b[-1] < a[0]:
+        return b + a
+    return array("Q", sorted(chain(a, b)))
+
+
+class _SortedRuns:
+    """若干值互不相交的升序 array('Q') 段，查询对每段二分。
+
+    新段与末尾不比它长的段逐级归并（同二进制计数器进位），段数保持 O(log n)，
+    每个值均摊只被归并 O(log n) 次，追加一批的代价与已有增量的大小无关。段一经生成不再修改。
+    """
+
+    def __init__(self, runs=()):
+        self.runs = [run for run in runs if len(run)]
+        self._len = sum(map(len, self.runs))
+        self._flat = None
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return heapq.merge(*self.runs)
+
+    def __contains__(self, x):
+        return any(_sorted_contains(run, x) for run in self.runs)
+
+    def add(self, values):
+        run = array("Q", values)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = _merge_runs(self.runs.pop(), run)
+        self.runs.append(run)
+        self._len += len(values)
+        self._flat = None
+
+    def joined(self, other):
+        return _SortedRuns(self.runs + other.runs)
+
+    def last(self):
+        return max((run[-1] for run in self.runs), default=-1)
+
+    def count(self, a, b):
+        return sum(bisect_right(run, b) - bisect_left(run, a) for run in self.runs)
+
+    def range(self, a, b):
+        return list(heapq.merge(*(run[bisect_left(run, a): bisect_right(run, b)] for run in self.runs)))
+
+    def flat(self):
+        # 合并成一个有序数组，供视图与 nth 使用；结果缓存到下一次 add
+        if self._flat is None:
+            self._flat = self.runs[0] if len(self.runs) == 1 else array("Q", sorted(chain(*self.runs)))
+        return self._flat
+
+
+# Windows 上被映射的文件不能替换；POSIX 上替换不受影响，旧视图继续读替换前的文件
+_MAPS_BLOCK_REPLACE = os.name == "nt"
+
+
+class _StoreState:
+    # 同一库文件在进程内共享的状态：增量区、正在合并的旧增量区、已覆盖区间，
+    # 以及视图持有的主文件映射（_MAPS_BLOCK_REPLACE 时归并要避开它们）
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.compact_lock = threading.Lock()
+        self.loaded = False
+        self.delta = _SortedRuns()
+        self.old = _SortedRuns()
+        self.covered = []
+        self.compactor = None
+        self.retry_at = 0
+        self.maps = weakref.WeakSet()
+        self._pending = None
+
+    def pending(self):
+        # 旧增量与增量的合并视图，两者变化（changed）前一直复用
+        if self._pending is None:
+            self._pending = self.old.joined(self.delta) if self.old else self.delta
+        return self._pending
+
+    def changed(self):
+        self._pending = None
+
+    def replace_blocked(self):
+        return _MAPS_BLOCK_REPLACE and any(not mm.closed for mm in self.maps)
+
+
+_store_states = {}
+_store_states_lock = threading.Lock()
+
+
+def _store_state(filename):
+    with _store_states_lock:
+        return _store_states.setdefault(os.path.abspath(filename), _StoreState())
+
+
+def _sorted_contains(values, x):
+    i = bisect_left(values, x)
+    return i < len(values) and values[i] == x
+
+
+def _merged_nth(main_at, main_len, extra, k):
+    # 两个不相交的有序序列合并后的第 k 个元素；j 为前 k+1 个元素中来自 extra 的个数
+    lo, hi = max(0, k + 1 - main_len), min(k + 1, len(extra))
+    while lo < hi:
+        j = (lo + hi) // 2
+        if extra[j] < main_at(k - j):
+            lo = j + 1
+        else:
+            hi = j
+    candidates = []
+    if lo > 0:
+        candidates.append(extra[lo - 1])
+    if k - lo >= 0:
+        candidates.append(main_at(k - lo))
+    return max(candidates)
+
+
+class PrimeStore:
+    """二进制素数库：16 字节头（魔数 + 条数）后接升序去重的 uint64 小端定宽数组。
+
+    第 k 个素数位于固定偏移，count/nth/range/contains 只按需读取少量记录，无需加载整个文件。
+    写入时按值去重：整批大于库尾时原地追加，其余写入增量文件 *.delta，
+    累积到 COMPACT_THRESHOLD 后由后台线程归并回主文件。*.meta.json 记录已完整生成的区间。
+    """
+
+    _MAGIC = b"PRMDB001"
+    _HEADER = struct.Struct("<8sQ")
+    _ITEM = 8
+    READ_CHUNK = 1 << 16
+    COMPACT_THRESHOLD = 1 << 20
+
+    def __init__(self, filename=PRIME_DB_BIN):
+        self.filename = filename
+        self.delta_file = filename + ".delta"
+        self.old_delta_file = filename + ".delta.old"
+        self.meta_file = filename + ".meta.json"
+        self._state = _store_state(filename)
+
+    def _read_count(self, f):
+        head = f.read(self._HEADER.size)
+        if len(head) < self._HEADER.size:
+            return 0
+        magic, count = self._HEADER.unpack(head)
+        if magic != self._MAGIC:
+            raise ValueError(f"不是素数库文件: {self.filename}")
+        return count
+
+    def _reader(self):
+        try:
+            f = open(self.filename, "rb")
+        except FileNotFoundError:
+            return None, 0
+        return f, self._read_count(f)
+
+    def _read(self, f, i, n):
+        f.seek(self._HEADER.size + self._ITEM * i)
+        return _unpack_u64(f.read(self._ITEM * n))
+
+    def _bisect(self, f, count, x, right=False):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            v = self._read(f, mid, 1)[0]
+            if v < x or (right and v == x):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_delta(self, filename):
+        try:
+            with open(filename, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return []
+        return _unpack_u64(raw[: len(raw) - len(raw) % self._ITEM]).tolist()
+
+    def _load_state(self):
+        st = self._state
+        if st.loaded:
+            return st
+        # 崩溃后增量区可能与主文件重叠（合并已替换主文件但未删除旧增量），加载时剔除
+        main = self._main_view()
+        try:
+            old = [v for v in sorted(set(self._read_delta(self.old_delta_file))) if v not in main]
+            delta = [v for v in sorted(set(self._read_delta(self.delta_file)))
+                     if v not in main and not _sorted_contains(old, v)]
+        finally:
+            main.close()
+        st.old, st.delta = _SortedRuns([array("Q", old)]), _SortedRuns([array("Q", delta)])
+        st.changed()
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                st.covered = [tuple(iv) for iv in json.load(f).get("covered", [])]
+        except (OSError, ValueError):
+            st.covered = []
+        st.loaded = True
+        return st
+
+    def _pending(self):
+        return self._load_state().pending()
+
+    def _main_view(self, extra=()):
+        # 只映射头部记录的 count 条数据，映射本身 O(1)，与库大小无关
+        f, count = self._reader()
+        if f is None or count == 0:
+            if f is not None:
+                f.close()
+            return PrimeView(memoryview(array("Q")), extra=extra)
+        if sys.byteorder != "little":
+            f.close()
+            raise ValueError("内存映射视图仅支持小端平台")
+        with f:
+            size = self._HEADER.size + self._ITEM * count
+            mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._state.maps.add(mm)
+        return PrimeView(memoryview(mm)[self._HEADER.size: size].cast("Q"), mm, extra)
+
+    def view(self):
+        # 主文件映射与增量区快照在同一把锁内取得，保证视图完整；归并仍交给后台线程
+        with self._state.lock:
+            return self._main_view(self._pending().flat())
+
+    def __len__(self):
+        with self._state.lock:
+            f, count = self._reader()
+            if f is not None:
+                f.close()
+            return count + len(self._pending())
+
+    def __iter__(self):
+        return self.range(0, 2 ** 64 - 1)
+
+    def nth(self, k):
+        with self._state.lock:
+            pending = self._pending()
+            f, count = self._reader()
+            total = count + len(pending)
+            if k < 0:
+                k += total
+            if not 0 <= k < total:
+                if f is not None:
+                    f.close()
+                raise IndexError(f"下标越界: {k}")
+            extra = pending.flat()
+            if f is None:
+                return extra[k]
+            with f:
+                return _merged_nth(lambda i: self._read(f, i, 1)[0], count, extra, k)
+
+    def contains(self, p):
+        with self._state.lock:
+            if p in self._pending():
+                return True
+            f, count = self._reader()
+            if f is None:
+                return False
+            with f:
+                i = self._bisect(f, count, p)
+                return i < count and self._read(f, i, 1)[0] == p
+
+    def count(self, a, b):
+        if a > b:
+            return 0
+        with self._state.lock:
+            extra = self._pending().count(a, b)
+            f, count = self._reader()
+            if f is None:
+                return extra
+            with f:
+                return extra + self._bisect(f, count, b, right=True) - self._bisect(f, count, a)
+
+    def _main_range(self, a, b):
+        f, count = self._reader()
+        if f is None:
+            return
+        with f:
+            i = self._bisect(f, count, a)
+            j = self._bisect(f, count, b, right=True)
+            while i < j:
+                n = min(self.READ_CHUNK, j - i)
+                yield from self._read(f, i, n)
+                i += n
+
+    def range(self, a, b):
+        with self._state.lock:
+            extra = self._pending().range(a, b)
+        return heapq.merge(self._main_range(a, b), extra)
+
+    def range_blocks(self, a, b, size=CHUNK_SIZE):
+        # 按块产出 range(a, b)，供导出等整块处理的消费者使用
+        return _batched(self.range(a, b), size)
+
+    def append(self, primes, sorted_unique=False):
+        # 追加一批素数并保持全库去重；返回实际新增的个数。
+        # 筛出的段本身已升序无重复，sorted_unique=True 时跳过排序去重
+        new = list(primes) if sorted_unique else sorted(set(primes))
+        if not new:
+            return 0
+        st = self._state
+        with st.lock:
+            self._load_state()
+            if not os.path.exists(self.filename):
+                with open(self.filename, "wb") as f:
+                    f.write(self._HEADER.pack(self._MAGIC, 0))
+            with open(self.filename, "r+b") as f:
+                count = self._read_count(f)
+                tail = self._read(f, count - 1, 1)[0] if count else -1
+                if not st.old and new[0] > max(tail, st.delta.last()):
+                    f.seek(self._HEADER.size + self._ITEM * count)
+                    f.write(_pack_u64(new))
+                    f.flush()
+                    f.seek(0)
+                    f.write(self._HEADER.pack(self._MAGIC, count + len(new)))
+                    return len(new)
+            # new 已升序：只有落在 [new[0], new[-1]] 内的已有值可能重复，按区间取出比对，
+            # 顺序追加时这些区间通常为空，去重代价与库和增量区的大小无关
+            lo, hi = new[0], new[-1]
+            main = self._main_view()
+            try:
+                taken = set(main.range(lo, hi))
+            finally:
+                main.close()
+            taken.update(st.delta.range(lo, hi), st.old.range(lo, hi))
+            if taken:
+                new = [v for v in new if v not in taken]
+            if new:
+                with open(self.delta_file, "ab") as f:
+                    f.write(_pack_u64(new))
+                st.delta.add(new)
+                st.changed()
+                self._maybe_compact()
+            return len(new)
+
+    def _maybe_compact(self):
+        # 有视图挡住替换时等视图关闭后的下一次追加再归并，不起注定空转的线程
+        st = self._state
+        if len(st.delta) + len(st.old) < max(self.COMPACT_THRESHOLD, st.retry_at):
+            return
+        if st.replace_blocked() or (st.compactor is not None and st.compactor.is_alive()):
+            return
+        st.compactor = threading.Thread(target=self._compact_quietly, daemon=True)
+        st.compactor.start()
+
+    def _compact_quietly(self):
+        # 后台归并失败时状态已在 compact 里复原；增量区再翻一倍才重试，不让每次追加都重跑失败的归并
+        st = self._state
+        try:
+            self.compact()
+        except OSError:
+            with st.lock:
+                st.retry_at = 2 * (len(st.delta) + len(st.old))
+
+    def compact(self):
+        # 把增量区归并回主文件：先把增量文件改名冻结，锁外流式归并，最后原子替换主文件。
+        # 冻结期间禁止原地追加，主文件保持不变，新写入继续进入新的增量文件。
+        # Windows 上有视图仍映射着主文件时不归并，返回 False；归并出错时解冻增量区、删掉临时文件后重新抛出
+        st = self._state
+        with st.compact_lock:
+            with st.lock:
+                self._load_state()
+                if st.replace_blocked():
+                    return False
+                if not st.old:
+                    if not st.delta:
+                        return True
+                    os.replace(self.delta_file, self.old_delta_file)
+                    st.old, st.delta = st.delta, _SortedRuns()
+                    st.changed()
+                old = st.old.flat()
+            tmp = self.filename + ".tmp"
+            try:
+                self._merge_to_tmp(old, tmp)
+                with st.lock:
+                    if st.replace_blocked():
+                        self._thaw(tmp)
+                        return False
+                    os.replace(tmp, self.filename)
+                    st.old = _SortedRuns()
+                    st.retry_at = 0
+                    st.changed()
+            except BaseException:
+                with st.lock:
+                    self._thaw(tmp)
+                raise
+            with contextlib.suppress(OSError):
+                # 旧增量已全部进入主文件，删不掉也无妨：加载时会剔除与主文件重复的值
+                os.remove(self.old_delta_file)
+            return True
+
+    def _thaw(self, tmp):
+        # 放弃这次归并：冻结的旧增量并回增量文件，恢复原地追加；写回失败时保持冻结，状态仍然一致
+        st = self._state
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        if not st.old:
+            return
+        with contextlib.suppress(OSError):
+            with open(self.delta_file, "ab") as f:
+                f.write(_pack_u64(st.old.flat()))
+            os.remove(self.old_delta_file)
+            st.delta = st.old.joined(st.delta)
+            st.old = _SortedRuns()
+            st.changed()
+
+    def _merge_to_tmp(self, values, tmp):
+        f, count = self._reader()
+        total = 0
+        with open(tmp, "wb") as out:
+            out.write(self._HEADER.pack(self._MAGIC, 0))
+            if f is not None:
+                with f:
+                    i = self._bisect(f, count, values[0])
+                    f.seek(self._HEADER.size)
+                    remaining = self._ITEM * i
+                    while remaining:
+                        chunk = f.read(min(remaining, self._ITEM * self.READ_CHUNK))
+                        out.write(chunk)
+                        remaining -= len(chunk)
+                    total = i
+                    rest = self._main_range(values[0], 2 ** 64 - 1)
+                    total += self._write_merged(out, heapq.merge(rest, values))
+            else:
+                total = self._write_merged(out, values)
+            out.seek(0)
+            out.write(self._HEADER.pack(self._MAGIC, total))
+
+    def _write_merged(self, out, values):
+        written = 0
+        batch = []
+        for v in _unique_sorted(values):
+            batch.append(v)
+            if len(batch) >= self.READ_CHUNK:
+                out.write(_pack_u64(batch))
+                written += len(batch)
+                batch.clear()
+        out.write(_pack_u64(batch))
+        return written + len(batch)
+
+    def sync(self):
+        # 把主文件与增量文件刷到磁盘；断点记录前调用
+        with self._state.lock:
+            for filename in (self.filename, self.delta_file):
+                if os.path.exists(filename):
+                    with open(filename, "ab") as f:
+                        os.fsync(f.fileno())
+
+    def covered(self):
+        with self._state.lock:
+            return list(self._load_state().covered)
+
+    def missing(self, a, b):
+        # [a, b] 中尚未完整生成过的子区间
+        gaps = []
+        for lo, hi in self.covered():
+            if hi < a:
+                continue
+            if lo > b:
+                break
+            if lo > a:
+                gaps.append((a, lo - 1))
+            a = max(a, hi + 1)
+            if a > b:
+                return gaps
+        gaps.append((a, b))
+        return gaps
+
+    def mark_covered(self, a, b):
+        with self._state.lock:
+            st = self._load_state()
+            merged = []
+            for lo, hi in sorted(st.covered + [(a, b)]):
+                if merged and lo <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+                else:
+                    merged.append((lo, hi))
+            st.covered = merged
+            tmp = self.meta_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"covered": merged}, f)
+            os.replace(tmp, self.meta_file)
+
+    def clear(self):
+        st = self._state
+        with st.compact_lock, st.lock:
+            for filename in (self.filename, self.delta_file, self.old_delta_file, self.meta_file):
+                if os.path.exists(filename):
+                    os.remove(filename)
+            st.delta, st.old, st.covered = _SortedRuns(), _SortedRuns(), []
+            st.changed()
+            st.loaded = True
+
+
+def save_primes_store(primes, filename=PRIME_DB_BIN):
+    return PrimeStore(filename).append(primes)
+
+
+def import_legacy_db(store, json_file=PRIME_DB_JSON, nd_file=PRIME_DB_ND):
+    # 把旧版 JSON / NDJSON 文本库并入二进制库，导入后改名为 *.imported 以免重复导入
+    if os.path.exists(json_file):
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                store.append(v for v in data if isinstance(v, int) and v >= 2)
+            os.replace(json_file, json_file + ".imported")
+        except Exception:
+            pass
+    if os.path.exists(nd_file):
+        try:
+            batch = []
+            with open(nd_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        batch.append(int(line))
+                    except ValueError:
+                        continue
+                    if len(batch) >= PrimeStore.READ_CHUNK:
+                        store.append(batch)
+                        batch = []
+            store.append(batch)
+            os.replace(nd_file, nd_file + ".imported")
+        except Exception:
+            pass
+
+
+def load_prime_db(filename=PRIME_DB_BIN, json_file=PRIME_DB_JSON, nd_file=PRIME_DB_ND):
+    store = PrimeStore(filename)
+    import_legacy_db(store, json_file, nd_file)
+    try:
+        return store.view()
+    except (OSError, ValueError):
+        return PrimeView(memoryview(array("Q")))
+
+
+class Checkpoint:
+    """断点文件：先写临时文件并落盘再原子替换，进程中途退出或断电时上一次的断点仍然完整。"""
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def load(self):
+        try:
+            with open(self.filename, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, state):
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.filename)
+
+    def clear(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+def _job_checkpoint(filename):
+    # 每个素数库旁最多一个未完成的生成任务
+    return Checkpoint(filename + ".job.json")
+
+
+class GenerationJob:
+    """后台生成任务：在工作线程里筛素数并写入素数库，进度与预览经队列交给界面线程。"""
+
+    def __init__(self, start, end, target_digit=None, filename=PRIME_DB_BIN):
+        self.start = start
+        self.end = end
+        self.target_digit = target_digit
+        self.store = PrimeStore(filename)
+        self.checkpoint = _job_checkpoint(filename)
+        self.events = queue.Queue()
+        self.next = start
+        self.count = 0
+        self.skipped = 0
+        self.preview = []
+        self._cancel = threading.Event()
+        self._thread = None
+        self._saved_at = 0.0
+
+    @classmethod
+    def resume(cls, filename=PRIME_DB_BIN):
+        # 按素数库旁的断点恢复未完成的任务；没有断点时返回 None
+        state = _job_checkpoint(filename).load()
+        if state is None:
+            return None
+        job = cls(state["start"], state["end"], state["digit"], filename)
+        job.next, job.count, job.skipped = state["next"], state["count"], state["skipped"]
+        return job
+
+    @staticmethod
+    def pending(filename=PRIME_DB_BIN):
+        return _job_checkpoint(filename).load()
+
+    @staticmethod
+    def discard(filename=PRIME_DB_BIN):
+        _job_checkpoint(filename).clear()
+
+    def spawn(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        # 队列事件：("progress", 0..1)、("preview", 素数列表)、("done", 是否已取消)、("error", 信息)。
+        # 完成后删除断点；取消或出错时断点保留，之后可用 resume 接着跑
+        try:
+            self._run()
+        except Exception as e:
+            self.events.put(("error", str(e)))
+        else:
+            if not self.cancelled:
+                self.checkpoint.clear()
+            self.events.put(("done", self.cancelled))
+
+    def _save_checkpoint(self, writer, force=False, covered_from=None):
+        # 只在缓冲区刚交给写出阶段后调用：此时 next 之前的素数都已交出，count 与之对应。
+        # 断点排在这些数据之后由写线程落盘；不筛个位时顺带把 [covered_from, next) 登记为已覆盖
+        now = time.monotonic()
+        if not force and now - self._saved_at < CHECKPOINT_INTERVAL:
+            return
+        self._saved_at = now
+        state = {
+            "start": self.start, "end": self.end, "digit": self.target_digit,
+            "next": self.next, "count": self.count, "skipped": self.skipped,
+        }
+        if self.target_digit is not None or covered_from is None or self.next <= covered_from:
+            covered_from = None
+        writer.after(lambda: self._commit_checkpoint(state, covered_from))
+
+    def _commit_checkpoint(self, state, covered_from):
+        # 断点之前的素数先落盘，断电后断点不会指向没写到磁盘上的数据
+        self.store.sync()
+        if covered_from is not None:
+            self.store.mark_covered(covered_from, state["next"] - 1)
+        self.checkpoint.save(state)
+
+    def _run(self):
+        with BulkWriter(lambda block: self.store.append(block, sorted_unique=True), threaded=True) as writer:
+            self._generate(writer)
+
+    def _generate(self, writer):
+        self._save_checkpoint(writer, force=True)
+        gaps = self.store.missing(self.next, self.end)
+        self.skipped += self.end - self.next + 1 - sum(hi - lo + 1 for lo, hi in gaps)
+        span = self.end - self.start + 1
+        buffer = []
+        for lo, hi in gaps:
+            upto = lo - 1
+            if self.target_digit is None:
+                blocks = sieve_blocks(lo, hi)
+            else:
+                blocks = residue_sieve_blocks(lo, hi, self.target_digit, 10)
+            for block in blocks:  # 块边界是检查取消、上报进度的时机
+                if self.cancelled:
+                    break
+                if not block:
+                    continue
+                upto = block[-1]
+                self.count += len(block)
+                if len(self.preview) < PREVIEW_SIZE:
+                    head = list(block[:PREVIEW_SIZE - len(self.preview)])
+                    self.preview += head
+                    self.events.put(("preview", head))
+                buffer.extend(block)
+                if len(buffer) >= CHUNK_SIZE:
+                    writer.write(buffer)
+                    buffer = []
+                    self.next = upto + 1
+                    self._save_checkpoint(writer, covered_from=lo)
+                self.events.put(("progress", (upto - self.start + 1) / span))
+            if buffer:
+                writer.write(buffer)
+                buffer = []
+            # 取消时只登记已处理完的前缀
+            covered_hi = upto if self.cancelled else hi
+            if self.target_digit is None and covered_hi >= lo:
+                writer.after(lambda lo=lo, hi=covered_hi: self.store.mark_covered(lo, hi))
+            self.next = covered_hi + 1
+            self._save_checkpoint(writer, force=True)
+            if self.cancelled:
+                break
+
+
+def count_primes_in_ranges(start, end, interval):
+    # 按估计代价选路径：每个桶边界一次 π(x) 约 end^(2/3)，直接筛整段约 end - start
+    ranges = []
+    if start < 2:
+        start = 2
+    current = start
+    while current < end:
+        nxt = min(current + interval - 1, end)
+        ranges.append((current, nxt))
+        current = nxt + 1
+    if not ranges:
+        return [], []
+    if (len(ranges) + 1) * end ** (2 / 3) < end - start:
+        # 边界按升序计算，先按最大的边界建好 π 表，免得每个边界都重建一次更大的表
+        _pi_table_for(_pi_table_limit(end))
+        edges = [prime_count(start - 1)] + [prime_count(hi) for _, hi in ranges]
+        counts = [b - a for a, b in zip(edges, edges[1:])]
+    else:
+        counts = count_primes_in_buckets(start, ranges[-1][1], interval)
+    return [f"{lo}-{hi}" for lo, hi in ranges], counts
+
+
+class GapBucket:
+    """一个桶的间隙统计：素数个数、间隙直方图、各间隙首次出现处、最大间隙，以及孪生/表兄弟/六素数对数与首对。"""
+
+    def __init__(self, lo, hi):
+        self.lo = lo
+        self.hi = hi
+        self.count = 0
+        self.gaps = Counter()
+        self.first = {}
+        self.max_gap = 0
+        self.max_gap_at = None
+        self.twins = 0
+        self.cousins = 0
+        self.sexy = 0
+        self.first_pairs = {}
+
+    @property
+    def label(self):
+        return f"{self.lo}-{self.hi}"
+
+    def _pair_at(self, d, p):
+        if p < self.first_pairs.get(d, p + 1):
+            self.first_pairs[d] = p
+
+    def _add_gaps(self, starts, gaps):
+        # starts[i] 与 starts[i] + gaps[i] 是相邻素数
+        hist = Counter(gaps)
+        self.gaps.update(hist)
+        for g in hist:
+            if g not in self.first:
+                self.first[g] = starts[gaps.index(g)]
+        widest = max(hist)
+        if widest > self.max_gap:
+            self.max_gap, self.max_gap_at = widest, starts[gaps.index(widest)]
+        self.twins += hist[2]
+        self.cousins += hist[4]
+        self.sexy += hist[6]
+        for d in (2, 4, 6):
+            if hist[d]:
+                self._pair_at(d, starts[gaps.index(d)])
+
+    def _add_spans(self, starts, spans):
+        # 相邻两个间隙之和：为 4 只有 3、5、7 一处（表兄弟对 3, 7），为 6 是中间隔一个素数的六素数对
+        for d, kind in ((4, "cousins"), (6, "sexy")):
+            n = spans.count(d)
+            if n:
+                setattr(self, kind, getattr(self, kind) + n)
+                self._pair_at(d, starts[spans.index(d)])
+
+
+class PrimeGapStats:
+    """素数间隙的单遍流式统计：升序素数块逐块喂入，按桶累计 GapBucket，内存只与桶数有关。"""
+
+    def __init__(self, start, end, interval):
+        if interval <= 0:
+            raise ValueError("区间大小必须为正")
+        self.start = max(start, 2)
+        self.end = end
+        self.interval = interval
+        self.buckets = [GapBucket(lo, min(lo + interval - 1, end)) for lo in range(self.start, end + 1, interval)]
+        self._tail = []
+
+    def feed(self, primes):
+        # primes 须在 [start, end] 内、升序且紧接上一次喂入的素数
+        primes = primes if isinstance(primes, list) else list(primes)
+        i = 0
+        while i < len(primes):
+            bucket = self.buckets[(primes[i] - self.start) // self.interval]
+            j = bisect_right(primes, bucket.hi, i)
+            self._feed_bucket(bucket, primes[i:j])
+            i = j
+
+    def _feed_bucket(self, bucket, primes):
+        # 间隙与跨度都记在起点素数所在的桶；起点在上一块末尾的那几项单独归属
+        bucket.count += len(primes)
+        seq = self._tail + primes
+        k = len(self._tail)
+        gaps = list(map(sub, seq[1:], seq[:-1]))
+        spans = list(map(add, gaps, gaps[1:]))
+        for j in range(max(k - 2, 0), k):
+            owner = self.buckets[(seq[j] - self.start) // self.interval]
+            if j == k - 1 and j < len(gaps):
+                owner._add_gaps([seq[j]], [gaps[j]])
+            if j < len(spans):
+                owner._add_spans([seq[j]], [spans[j]])
+        if len(gaps) > k:
+            bucket._add_gaps(seq[k:-1], gaps[k:])
+        if len(spans) > k:
+            bucket._add_spans(seq[k:-2], spans[k:])
+        self._tail = seq[-2:]
+
+
+def prime_gap_statistics(start, end, interval, engine=None):
+    # 只统计两端都在 [start, end] 内的间隙与素数对；返回各桶的 GapBucket
+    stats = PrimeGapStats(start, end, interval)
+    for block in sieve_blocks(stats.start, end, engine):
+        stats.feed(block)
+    return stats.buckets
@@ -96,17 +96,43 @@ def segmented_sieve_generator(start, end, segment_size=32768):
         low += segment_size
 
 
+# n <= 1e6 的素性查表：奇数位图，第 i 位对应 2i+1，首次查询时构建
+SMALL_PRIME_LIMIT = 1000000
+# n < 4759123141（覆盖全部 32 位整数）时这三个基即为确定性判定
+MR_BASES_32 = (2, 7, 61)
+MR_LIMIT_32 = 4759123141
+_small_prime_bits = None
+
+
+def _small_prime_bitmap():
+    global _small_prime_bits
+    if _small_prime_bits is None:
+        half = SMALL_PRIME_LIMIT // 2 + 1
+        flags = bytearray(b"\x01") * half
+        flags[0] = 0
+        for i in range(1, (math.isqrt(SMALL_PRIME_LIMIT) - 1) // 2 + 1):
+            if flags[i]:
+                p = 2 * i + 1
+                start = p * p // 2
+                flags[start::p] = bytes(len(range(start, half, p)))
+        flags += bytes(-len(flags) % 8)
+        packed = 0
+        for k in range(8):
+            packed |= int.from_bytes(flags[k::8], "little") << k
+        _small_prime_bits = packed.to_bytes(len(flags) // 8, "little")
+    return _small_prime_bits
+
+
 def is_prime(n):
     if n < 2:
         return False
-    if n <= 1000000:
+    if n <= SMALL_PRIME_LIMIT:
         if n % 2 == 0:
             return n == 2
-        r = int(math.isqrt(n))
-        for d in range(3, r + 1, 2):
-            if n % d == 0:
-                return False
-        return True
+        i = n >> 1
+        return bool(_small_prime_bitmap()[i >> 3] >> (i & 7) & 1)
+    if n < MR_LIMIT_32:
+        return miller_rabin(n, MR_BASES_32)
     return miller_rabin(n)
 
 
@@ -794,24 +820,55 @@ def segmented_sieve_generator(start, end, segment_size=32768):
         low += segment_size
 
 
+# 小范围素性查表：奇数位图（第 i 位对应 2i+1），首次查询时构建
+SMALL_PRIME_LIMIT = 1000000
+# 32 位范围的确定性 Miller-Rabin 基：n < 4759123141 时 {2, 7, 61} 足够
+MR_BASES_32 = (2, 7, 61)
+MR_LIMIT_32 = 4759123141
+_small_prime_bits = None
+
+
+def _small_prime_bitmap():
+    """
+    构建 1..SMALL_PRIME_LIMIT 的奇数素性位图（约 62KB）。
+
+    先用只含奇数的 bytearray 做埃氏筛，再把每 8 个标志打包成一个字节。
+    """
+    global _small_prime_bits
+    if _small_prime_bits is None:
+        half = SMALL_PRIME_LIMIT // 2 + 1
+        flags = bytearray(b"\x01") * half
+        flags[0] = 0  # 1 不是素数
+        for i in range(1, (math.isqrt(SMALL_PRIME_LIMIT) - 1) // 2 + 1):
+            if flags[i]:
+                p = 2 * i + 1
+                start = p * p // 2
+                flags[start::p] = bytes(len(range(start, half, p)))
+        # 按字节打包：第 k 组步长切片整体移到第 k 位
+        flags += bytes(-len(flags) % 8)
+        packed = 0
+        for k in range(8):
+            packed |= int.from_bytes(flags[k::8], "little") << k
+        _small_prime_bits = packed.to_bytes(len(flags) // 8, "little")
+    return _small_prime_bits
+
+
 def is_prime(n):
     """
-    统一的素数判断接口：对小数使用快速试除，对大数使用 Miller-Rabin。
+    统一的素数判断接口：对小数查预计算位图，对大数使用 Miller-Rabin。
 
-    说明：对于 n <= 1e6，朴素试除相当快速且确定；
-    对于更大的 n，使用 Miller-Rabin 更高效。
+    说明：对于 n <= 1e6，直接查奇数位图，O(1)；
+    32 位范围用 {2, 7, 61} 三个基即可确定，更大的 n 用 64-bit 确定性基。
     """
     if n < 2:
         return False
-    if n <= 1000000:
-        # 对小 n 使用简单试除（跳过偶数）
+    if n <= SMALL_PRIME_LIMIT:
         if n % 2 == 0:
             return n == 2
-        r = int(math.isqrt(n))
-        for d in range(3, r + 1, 2):
-            if n % d == 0:
-                return False
-        return True
+        i = n >> 1
+        return bool(_small_prime_bitmap()[i >> 3] >> (i & 7) & 1)
+    if n < MR_LIMIT_32:
+        return miller_rabin(n, MR_BASES_32)
     # 对更大 n 使用 Miller-Rabin（确定性基在 64-bit 范围内）
     return miller_rabin(n)
 
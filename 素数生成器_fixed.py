@@ -1,386 +1,358 @@
 """
 素数生成器 - 修复副本
 
-说明：这是清理并修复缩进后的单一版本。请用此文件替代原文件或作为参考。
+说明：这是清理并修复缩进后的单一版本，也是程序入口：
+- 算法与存储在 素数核心.py，导入时不加载任何图形库；
+- 图形界面在 素数界面.py，访问 PrimeApp 或不带子命令运行时才导入；
+- 本文件提供命令行（python -m 素数生成器_fixed --help），并转出核心模块的全部公开名字。
 """
 
-import tkinter as tk
-from tkinter import messagebox, ttk
-import json
+import argparse
+import contextlib
 import os
-import math
+import sys
 import time
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-PRIME_DB_JSON = "primes_db.json"
-PRIME_DB_ND = "primes_db.ndjson"
-MR_BASES_64 = [2, 325, 9375, 28178, 450775, 9780504, 1795265022]
-CHUNK_SIZE = 5000
-
-
-def miller_rabin(n, bases=MR_BASES_64):
-    if n < 2:
-        return False
-    small_primes = (2, 3, 5, 7, 11, 13, 17, 19, 23)
-    for p in small_primes:
-        if n == p:
-            return True
-        if n % p == 0:
-            return False
-
-    d = n - 1
-    s = 0
-    while d % 2 == 0:
-        s += 1
-        d //= 2
-
-    def check(a, s, d, n):
-        x = pow(a, d, n)
-        if x == 1 or x == n - 1:
-            return True
-        for _ in range(s - 1):
-            x = (x * x) % n
-            if x == n - 1:
-                return True
-        return False
-
-    for a in bases:
-        if a % n == 0:
-            continue
-        if not check(a, s, d, n):
-            return False
-    return True
-
-
-def sieve_of_eratosthenes(limit):
-    if limit < 2:
-        return []
-    sieve = bytearray(b"\x01") * (limit + 1)
-    sieve[0:2] = b"\x00\x00"
-    for i in range(2, int(math.isqrt(limit)) + 1):
-        if sieve[i]:
-            step = i
-            start = i * i
-            sieve[start: limit + 1: step] = b"\x00" * ((limit - start) // step + 1)
-    return [i for i, isprime in enumerate(sieve) if isprime]
-
-
-def segmented_sieve_generator(start, end, segment_size=32768):
-    if end < 2 or start > end:
+from itertools import chain
+
+import 素数核心
+from 素数核心 import (
+    CHECKPOINT_INTERVAL,
+    CHUNK_SIZE,
+    EXPORT_FORMATS,
+    PRIME_DB_BIN,
+    SIEVE_CALIBRATION_FILE,
+    SIEVE_ENGINES,
+    SIEVE_MAX,
+    WRITE_BUFFER_SIZE,
+    BulkWriter,
+    Checkpoint,
+    PrimeStore,
+    count_primes_in_ranges,
+    default_segment_bytes,
+    encode_lines,
+    export_primes,
+    factor_range,
+    is_prime_many,
+    prime_count_range,
+    prime_factors,
+    prime_gap_statistics,
+    prove_prime,
+    residue_sieve_blocks,
+    sieve_blocks,
+    sieve_calibration,
+)
+
+
+def __getattr__(name):
+    # PEP 562：界面相关名字按需从 素数界面 加载；旧的 import 素数生成器_fixed 用法从 素数核心 转出其余公开名字
+    if name in ("PrimeApp", "run_gui"):
+        import 素数界面
+        return getattr(素数界面, name)
+    if name in 素数核心.__all__:
+        return getattr(素数核心, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _non_negative(text):
+    try:
+        n = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是整数：{text}")
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"需要非负整数：{text}")
+    return n
+
+
+def _cli_output(path):
+    # "-" 表示标准输出
+    return contextlib.nullcontext(sys.stdout) if path == "-" else open(path, "w", encoding="utf-8")
+
+
+def _cli_sieve_end(end):
+    # 要筛的区间（以及写入素数库的值）不能超过 64 位
+    if end > SIEVE_MAX:
+        raise SystemExit(f"终止值超出 64 位范围：{end}（最大 {SIEVE_MAX}）")
+
+
+def _cli_numbers(values, bad):
+    # 命令行给出的数，或未给出时逐行读取标准输入；
+    # 同 coreutils factor，坏行报到标准错误并跳过，记入 bad 供调用方设置退出码，已读到的数照常输出
+    if values:
+        yield from values
         return
-    if start < 2:
-        start = 2
-    limit = int(math.isqrt(end)) + 1
-    small_primes = sieve_of_eratosthenes(limit)
-    low = start
-    while low <= end:
-        high = min(low + segment_size - 1, end)
-        seg_len = high - low + 1
-        segment = bytearray(b"\x01") * seg_len
-        for p in small_primes:
-            if p * p > high:
-                break
-            start_idx = max(p * p, ((low + p - 1) // p) * p)
-            for multiple in range(start_idx, high + 1, p):
-                segment[multiple - low] = 0
-        for i in range(seg_len):
-            if segment[i]:
-                yield low + i
-        low += segment_size
-
-
-def is_prime(n):
-    if n < 2:
-        return False
-    small_primes = (2, 3, 5, 7, 11, 13, 17, 19, 23)
-    for p in small_primes:
-        if n == p:
-            return True
-        if n % p == 0:
-            return False
-    return miller_rabin(n)
-
-
-def prime_factors(n):
-    factors = []
-    if n <= 1:
-        return factors
-    for p in (2, 3, 5):
-        while n % p == 0:
-            factors.append(p)
-            n //= p
-    f = 7
-    step = 4
-    while f * f <= n:
-        while n % f == 0:
-            factors.append(f)
-            n //= f
-        f += step
-        step = 6 - step
-    if n > 1:
-        factors.append(n)
-    return factors
-
-
-def save_primes_ndappend(primes_iterable, filename=PRIME_DB_ND):
-    with open(filename, "a", encoding="utf-8") as f:
-        for p in primes_iterable:
-            f.write(f"{p}\n")
-
-
-def save_primes_json(primes_list, filename=PRIME_DB_JSON):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(primes_list, f, ensure_ascii=False)
-
-
-def load_prime_db(json_file=PRIME_DB_JSON, nd_file=PRIME_DB_ND):
-    if os.path.exists(json_file):
-        try:
-            with open(json_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            pass
-    if os.path.exists(nd_file):
-        primes = []
-        try:
-            with open(nd_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        primes.append(int(line))
-                    except:
-                        continue
-        except Exception:
-            return []
-        return primes
-    return []
-
-
-def count_primes_in_ranges(start, end, interval):
-    ranges = []
-    counts = []
-    if start < 2:
-        start = 2
-    current = start
-    while current < end:
-        nxt = min(current + interval - 1, end)
-        cnt = 0
-        for p in segmented_sieve_generator(current, nxt, segment_size=max(32768, interval)):
-            cnt += 1
-        ranges.append(f"{current}-{nxt}")
-        counts.append(cnt)
-        current = nxt + 1
-    return ranges, counts
-
-
-class PrimeApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("素数生成器")
-        self.root.geometry("900x700")
-        self.notebook = ttk.Notebook(root)
-        self.notebook.pack(fill=tk.BOTH, expand=True)
-        self.create_generate_page()
-        self.create_check_page()
-        self.create_db_page()
-        self.create_plot_page()
-
-    def create_generate_page(self):
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="生成与保存")
-        tk.Label(frame, text="起始值：").grid(row=0, column=0, sticky='e', padx=6, pady=6)
-        self.start_var = tk.StringVar(value="1")
-        tk.Entry(frame, textvariable=self.start_var, width=20).grid(row=0, column=1, padx=6, pady=6)
-        tk.Label(frame, text="终止值：").grid(row=1, column=0, sticky='e', padx=6, pady=6)
-        self.end_var = tk.StringVar(value="100000")
-        tk.Entry(frame, textvariable=self.end_var, width=20).grid(row=1, column=1, padx=6, pady=6)
-        tk.Label(frame, text="个位筛选（留空表示不筛）：").grid(row=2, column=0, sticky='e', padx=6, pady=6)
-        self.digit_var = tk.StringVar()
-        tk.Entry(frame, textvariable=self.digit_var, width=20).grid(row=2, column=1, padx=6, pady=6)
-        tk.Button(frame, text="开始生成", command=self.generate_action, bg="#4CAF50", fg="white").grid(row=3, column=0, columnspan=2, pady=8)
-        self.gen_text = tk.Text(frame, height=14, width=90, font=("Courier", 9))
-        self.gen_text.grid(row=4, column=0, columnspan=2, padx=6, pady=6)
-
-    def generate_action(self):
-        try:
-            start = int(self.start_var.get().strip())
-            end = int(self.end_var.get().strip())
-            if start < 0 or end <= start:
-                raise ValueError
-        except Exception:
-            messagebox.showerror("输入错误", "请输入合理的起始与终止值！")
-            return
-        target_digit = None
-        d = self.digit_var.get().strip()
-        if d != "":
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
             try:
-                td = int(d)
-                if 0 <= td <= 9:
-                    target_digit = td
-                else:
-                    raise ValueError
-            except Exception:
-                messagebox.showerror("输入错误", "个位筛选请输入 0-9 或留空！")
-                return
-        range_size = end - start + 1
-        if range_size <= 5_000_000:
-            iterator = (p for p in sieve_of_eratosthenes(end) if p >= start)
-        else:
-            seg_size = 65536
-            if range_size > 50_000_000:
-                seg_size = 262144
-            iterator = segmented_sieve_generator(start, end, segment_size=seg_size)
-        progress = tk.Toplevel(self.root)
-        progress.title("进度")
-        tk.Label(progress, text=f"正在生成 {start} 到 {end} 的素数...").pack(padx=10, pady=6)
-        pb = ttk.Progressbar(progress, orient='horizontal', length=400, mode='determinate')
-        pb.pack(padx=10, pady=6)
-        self.gen_text.delete(1.0, tk.END)
-        primes_count = 0
-        preview = []
-        buffer = []
-        last_update = time.time()
-        processed = 0
+                yield _non_negative(line)
+            except argparse.ArgumentTypeError as e:
+                print(e, file=sys.stderr)
+                bad.append(line)
+
+
+def _cli_generate(args):
+    # 输出到文件时在 FILE.ckpt 里记录断点（下一个待筛的整数、已输出个数、文件偏移），
+    # --resume 把文件截回断点处的偏移后接着筛；文件比断点偏移还短说明数据没写到磁盘，拒绝续跑
+    if args.end < args.start:
+        raise SystemExit("终止值不能小于起始值")
+    _cli_sieve_end(args.end)
+    if args.mod is not None and args.mod[1] == 0:
+        raise SystemExit("模数必须为正")
+    store = PrimeStore(args.db) if args.save else None
+    checkpoint = None if args.output == "-" else Checkpoint(args.output + ".ckpt")
+    job = {"start": args.start, "end": args.end, "digit": args.digit, "mod": args.mod}
+    state = {**job, "next": args.start, "count": 0, "offset": 0}
+    if args.resume:
+        saved = checkpoint.load() if checkpoint else None
+        if saved is None:
+            raise SystemExit("没有找到断点文件，--resume 需要与上次相同的 -o 输出文件")
+        if {k: saved.get(k) for k in job} != job:
+            raise SystemExit(f"断点属于另一个任务：{saved['start']} 到 {saved['end']}"
+                             f"（个位 {saved['digit']}，剩余类 {saved.get('mod')}）")
         try:
-            with open(PRIME_DB_ND, 'a', encoding='utf-8') as ndfile:
-                for p in iterator:
-                    processed += 1
-                    if target_digit is not None and p % 10 != target_digit:
-                        continue
-                    primes_count += 1
-                    if len(preview) < 200:
-                        preview.append(p)
-                    buffer.append(p)
-                    if len(buffer) >= CHUNK_SIZE:
-                        for v in buffer:
-                            ndfile.write(f"{v}\n")
-                        buffer.clear()
-                    if range_size > 0 and (time.time() - last_update) > 0.2:
-                        pb['value'] = min(100, processed / range_size * 100)
-                        progress.update()
-                        last_update = time.time()
-                if buffer:
-                    for v in buffer:
-                        ndfile.write(f"{v}\n")
-                    buffer.clear()
-            pb['value'] = 100
-            progress.update()
-        except Exception as e:
-            messagebox.showerror("错误", f"生成过程中出错: {e}")
-        finally:
+            size = os.path.getsize(args.output)
+        except OSError:
+            size = -1
+        if size < saved["offset"]:
+            raise SystemExit(f"输出文件 {args.output} 比断点记录的 {saved['offset']} 字节短，"
+                             "断点之前的数据已丢失，无法续跑")
+        state = saved
+    # 个位或剩余类筛选只筛对应的等差数列，不筛出全部素数再丢弃
+    residue = (args.digit, 10) if args.digit is not None else args.mod
+    try:
+        if residue is None:
+            blocks = sieve_blocks(state["next"], args.end, args.engine, workers=args.workers)
+        else:
+            blocks = residue_sieve_blocks(state["next"], args.end, *residue)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if checkpoint is None:
+        out = contextlib.nullcontext(sys.stdout.buffer)
+    else:
+        out = open(args.output, "r+b" if args.resume else "wb", buffering=WRITE_BUFFER_SIZE)
+        out.truncate(state["offset"])
+        out.seek(state["offset"])
+        checkpoint.save(state)
+
+    def commit(f, snapshot):
+        # 在写线程里执行：此前交出的段都已写入 f，此时的偏移与断点对应；先落盘再记断点
+        f.flush()
+        os.fsync(f.fileno())
+        snapshot["offset"] = f.tell()
+        checkpoint.save(snapshot)
+
+    saved_at = time.monotonic()
+    with out as f, BulkWriter(f.write, encode_lines, threaded=True) as writer:
+        for block in blocks:
+            upto = block[-1] if len(block) else None
+            if len(block):
+                writer.write(block)
+                if store is not None:
+                    store.append(block, sorted_unique=True)
+                state["count"] += len(block)
+            if checkpoint is not None and upto is not None and time.monotonic() - saved_at >= CHECKPOINT_INTERVAL:
+                state["next"] = upto + 1
+                writer.after(lambda snapshot=dict(state): commit(f, snapshot))
+                saved_at = time.monotonic()
+    if store is not None and residue is None:
+        store.mark_covered(args.start, args.end)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+
+def _cli_count(args):
+    _cli_sieve_end(args.end)
+    print(prime_count_range(args.start, args.end))
+
+
+def _cli_is_prime(args):
+    bad = []
+    numbers = _cli_numbers(args.numbers, bad)
+    if args.certify:
+        for n in numbers:
             try:
-                progress.destroy()
-            except Exception:
-                pass
-        self.gen_text.insert(tk.END, f"共找到 {primes_count} 个素数（已追加到 {PRIME_DB_ND}）：\n")
-        self.gen_text.insert(tk.END, ", ".join(map(str, preview)) + ("..." if primes_count > len(preview) else ""))
-        messagebox.showinfo("完成", f"已生成并保存 {primes_count} 个素数（分块追加）！")
-
-    def create_check_page(self):
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="素数判断")
-        tk.Label(frame, text="输入数字：").pack(pady=10)
-        self.check_var = tk.StringVar()
-        tk.Entry(frame, textvariable=self.check_var, width=30).pack()
-        tk.Button(frame, text="判断", command=self.check_action, bg="#2196F3", fg="white").pack(pady=10)
-        self.check_text = tk.Text(frame, height=14, width=75, font=("Courier", 9))
-        self.check_text.pack(padx=10, pady=5)
-
-    def check_action(self):
+                verdict = "prime" if prove_prime(n) else "composite"
+            except RuntimeError:
+                verdict = "probable-prime"
+            print(n, verdict)
+        return 1 if bad else 0
+    batch = []
+    for n in chain(numbers, [None]):
+        if n is not None:
+            batch.append(n)
+            if len(batch) < CHUNK_SIZE:
+                continue
+        flags = is_prime_many(batch)
+        sys.stdout.write("".join(f"{n} {'prime' if f else 'composite'}\n" for n, f in zip(batch, flags)))
+        batch = []
+    return 1 if bad else 0
+
+
+def _cli_factor(args):
+    # 输出格式同 coreutils factor："n: p1 p2 ..."
+    status = 0
+    bad = []
+    for n in _cli_numbers(args.numbers, bad):
         try:
-            n = int(self.check_var.get().strip())
-            if n < 0:
-                raise ValueError
-        except Exception:
-            messagebox.showerror("错误", "请输入有效的非负整数！")
-            return
-        self.check_text.delete(1.0, tk.END)
-        if is_prime(n):
-            self.check_text.insert(tk.END, f"{n} 是素数。\n")
-            save_primes_ndappend([n])
+            print(f"{n}:", *prime_factors(n))
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            status = 1
+    return 1 if bad else status
+
+
+def _cli_factor_range(args):
+    if args.end < args.start:
+        raise SystemExit("终止值不能小于起始值")
+    _cli_sieve_end(args.end)
+    with _cli_output(args.output) as out:
+        for n, factors in factor_range(args.start, args.end):
+            out.write(f"{n}: {' '.join(map(str, factors))}\n" if factors else f"{n}:\n")
+
+
+def _cli_gaps(args):
+    _cli_sieve_end(args.end)
+    try:
+        buckets = prime_gap_statistics(args.start, args.end, args.interval, args.engine)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    with _cli_output(args.output) as out:
+        out.write("range\tcount\tmax_gap\tmax_gap_at\ttwins\tcousins\tsexy\n")
+        for b in buckets:
+            at = "" if b.max_gap_at is None else b.max_gap_at
+            out.write(f"{b.label}\t{b.count}\t{b.max_gap}\t{at}\t{b.twins}\t{b.cousins}\t{b.sexy}\n")
+
+
+def _cli_histogram(args):
+    if args.interval <= 0:
+        raise SystemExit("区间大小必须为正")
+    _cli_sieve_end(args.end)
+    ranges, counts = count_primes_in_ranges(args.start, args.end, args.interval)
+    with _cli_output(args.output) as out:
+        for label, c in zip(ranges, counts):
+            out.write(f"{label}\t{c}\n")
+
+
+def _cli_export(args):
+    if args.sieve and args.end is None:
+        raise SystemExit("--sieve 需要指定 --end")
+    if args.sieve:
+        _cli_sieve_end(args.end)
+    try:
+        if args.sieve:
+            blocks = sieve_blocks(args.start, args.end, args.engine, workers=args.workers)
         else:
-            factors = prime_factors(n)
-            self.check_text.insert(tk.END, f"{n} 不是素数。\n")
-            self.check_text.insert(tk.END, f"质因数分解：{' × '.join(map(str, factors))} = {n}\n")
-            self.check_text.insert(tk.END, f"质因数列表：{factors}")
-
-    def create_db_page(self):
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="素数库")
-        tk.Button(frame, text="加载素数库", command=self.load_db, bg="#9C27B0", fg="white").pack(pady=10)
-        tk.Button(frame, text="清空素数库", command=self.clear_db, bg="#f44336", fg="white").pack(pady=5)
-        self.db_text = tk.Text(frame, height=16, width=75, font=("Courier", 9))
-        self.db_text.pack(padx=10, pady=5)
-
-    def load_db(self):
-        primes = load_prime_db()
-        self.db_text.delete(1.0, tk.END)
-        if primes:
-            self.db_text.insert(tk.END, f"素数库共 {len(primes)} 个素数：\n")
-            for i in range(0, len(primes), 20):
-                self.db_text.insert(tk.END, ", ".join(map(str, primes[i:i+20])) + "\n")
-        else:
-            self.db_text.insert(tk.END, "素数库为空。")
-
-    def clear_db(self):
-        if os.path.exists(PRIME_DB_JSON):
-            try:
-                os.remove(PRIME_DB_JSON)
-            except Exception:
-                pass
-        if os.path.exists(PRIME_DB_ND):
-            try:
-                os.remove(PRIME_DB_ND)
-            except Exception:
-                pass
-        self.db_text.delete(1.0, tk.END)
-        self.db_text.insert(tk.END, "素数库已清空。")
-        messagebox.showinfo("提示", "素数库已清空！")
-
-    def create_plot_page(self):
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="分布图")
-        tk.Label(frame, text="起始值：").grid(row=0, column=0, sticky='e', padx=10, pady=5)
-        self.plot_start_var = tk.StringVar(value="1")
-        tk.Entry(frame, textvariable=self.plot_start_var, width=25).grid(row=0, column=1, padx=10, pady=5)
-        tk.Label(frame, text="终止值：").grid(row=1, column=0, sticky='e', padx=10, pady=5)
-        self.plot_end_var = tk.StringVar(value="1000")
-        tk.Entry(frame, textvariable=self.plot_end_var, width=25).grid(row=1, column=1, padx=10, pady=5)
-        tk.Label(frame, text="区间大小：").grid(row=2, column=0, sticky='e', padx=10, pady=5)
-        self.interval_var = tk.StringVar(value="100")
-        tk.Entry(frame, textvariable=self.interval_var, width=25).grid(row=2, column=1, padx=10, pady=5)
-        tk.Button(frame, text="生成分布图", command=self.plot_distribution, bg="#FF9800", fg="white").grid(row=3, column=0, columnspan=2, pady=10)
-        self.fig_frame = tk.Frame(frame)
-        self.fig_frame.grid(row=4, column=0, columnspan=2, padx=10, pady=10)
-
-    def plot_distribution(self):
+            end = 2 ** 64 - 1 if args.end is None else args.end
+            blocks = PrimeStore(args.db).range_blocks(args.start, end)
+        count = export_primes(blocks, args.output, args.format)
+    except (ValueError, RuntimeError) as e:
+        raise SystemExit(str(e))
+    if args.output != "-":
+        print(f"已导出 {count} 个素数到 {args.output}", file=sys.stderr)
+
+
+def _cli_calibrate(args):
+    table = sieve_calibration(args.file, recalibrate=True)
+    for name, tiers in table["engines"].items():
+        for n, seconds in tiers.items():
+            print(f"{name}\t{n}\t{seconds:.4f}")
+    print(f"已保存到 {args.file}；分段筛段长 {default_segment_bytes()} 字节（按 CPU 缓存）", file=sys.stderr)
+
+
+def _engine_option(p):
+    p.add_argument("--engine", choices=sorted(SIEVE_ENGINES),
+                   help="筛法引擎：wheel 轮式分段筛、classic 逐字节埃氏筛、atkin、linear 线性筛；默认按本机校准结果自动选择")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m 素数生成器_fixed",
+        description="素数生成器命令行模式；不带子命令时启动图形界面。",
+    )
+    parser.add_argument("--db", default=PRIME_DB_BIN, help=f"素数库文件（默认 {PRIME_DB_BIN}）")
+    sub = parser.add_subparsers(dest="command", metavar="命令")
+
+    p = sub.add_parser("generate", help="生成区间内的素数，逐行输出")
+    p.add_argument("start", type=_non_negative)
+    p.add_argument("end", type=_non_negative)
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--digit", type=int, choices=range(10), help="只保留个位为该数字的素数")
+    group.add_argument("--mod", type=_non_negative, nargs=2, metavar=("R", "M"), help="只保留 ≡ R (mod M) 的素数")
+    p.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    p.add_argument("--save", action="store_true", help="同时写入素数库")
+    p.add_argument("--workers", type=int, help="并行进程数（默认 CPU 核数，1 表示单进程）")
+    p.add_argument("--resume", action="store_true", help="从 -o 文件旁的 .ckpt 断点继续上次中断的任务")
+    _engine_option(p)
+    p.set_defaults(handler=_cli_generate)
+
+    p = sub.add_parser("count", help="统计 [start, end] 内的素数个数")
+    p.add_argument("start", type=_non_negative)
+    p.add_argument("end", type=_non_negative)
+    p.set_defaults(handler=_cli_count)
+
+    p = sub.add_parser("is-prime", help="判断素性；不给出数时从标准输入逐行读取")
+    p.add_argument("numbers", nargs="*", type=_non_negative)
+    p.add_argument("--certify", action="store_true", help="超过 64 位时做 Pocklington 证明")
+    p.set_defaults(handler=_cli_is_prime)
+
+    p = sub.add_parser("factor", help="质因数分解；不给出数时从标准输入逐行读取")
+    p.add_argument("numbers", nargs="*", type=_non_negative)
+    p.set_defaults(handler=_cli_factor)
+
+    p = sub.add_parser("factor-range", help="分解 [start, end] 内的每个整数（分段筛，远快于逐个分解）")
+    p.add_argument("start", type=_non_negative)
+    p.add_argument("end", type=_non_negative)
+    p.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    p.set_defaults(handler=_cli_factor_range)
+
+    p = sub.add_parser("histogram", help="按区间统计素数个数，输出 区间<TAB>个数")
+    p.add_argument("start", type=_non_negative)
+    p.add_argument("end", type=_non_negative)
+    p.add_argument("interval", type=_non_negative)
+    p.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    p.set_defaults(handler=_cli_histogram)
+
+    p = sub.add_parser("gaps", help="按区间统计最大间隙与孪生/表兄弟/六素数对，输出制表符分隔的表")
+    p.add_argument("start", type=_non_negative)
+    p.add_argument("end", type=_non_negative)
+    p.add_argument("interval", type=_non_negative)
+    p.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    _engine_option(p)
+    p.set_defaults(handler=_cli_gaps)
+
+    p = sub.add_parser("export", help="流式导出素数库（或直接筛出）的素数")
+    p.add_argument("--start", type=_non_negative, default=0)
+    p.add_argument("--end", type=_non_negative)
+    p.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    p.add_argument("--format", choices=sorted(set(EXPORT_FORMATS.values())),
+                   help="txt 逐行文本、gz/zst 压缩文本、gaps 差分变长编码、npy NumPy 数组；默认按扩展名推断")
+    p.add_argument("--sieve", action="store_true", help="不读素数库，直接筛 [start, end] 并导出")
+    p.add_argument("--workers", type=int, help="--sieve 时的并行进程数")
+    _engine_option(p)
+    p.set_defaults(handler=_cli_export)
+
+    p = sub.add_parser("calibrate", help="在本机重新测速各筛法引擎，输出 引擎<TAB>规模<TAB>秒")
+    p.add_argument("--file", default=SIEVE_CALIBRATION_FILE, help=f"校准结果文件（默认 {SIEVE_CALIBRATION_FILE}）")
+    p.set_defaults(handler=_cli_calibrate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command is None:
         try:
-            start = int(self.plot_start_var.get().strip())
-            end = int(self.plot_end_var.get().strip())
-            interval = int(self.interval_var.get().strip())
-            if start < 0 or end <= start or interval <= 0:
-                raise ValueError
-        except Exception:
-            messagebox.showerror("输入错误", "请输入合理的数值！")
-            return
-        for widget in self.fig_frame.winfo_children():
-            widget.destroy()
-        ranges, counts = count_primes_in_ranges(start, end, interval)
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.bar(ranges, counts, color='lightgreen')
-        ax.set_title("素数区间分布")
-        ax.set_xlabel("数值区间")
-        ax.set_ylabel("素数个数")
-        plt.setp(ax.get_xticklabels(), rotation=45)
-        canvas = FigureCanvasTkAgg(fig, master=self.fig_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            from 素数界面 import run_gui
+        except ImportError as e:
+            print(f"无法加载图形界面（{e}）；命令行用法见 --help", file=sys.stderr)
+            return 2
+        return run_gui()
+    try:
+        return args.handler(args) or 0
+    except BrokenPipeError:
+        # 下游提前关闭管道（如 | head）时安静退出
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = PrimeApp(root)
-    root.mainloop()
+    sys.exit(main())
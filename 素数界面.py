@@ -0,0 +1,445 @@
+"""
+素数界面 - Tkinter 图形界面
+
+分布图页在第一次绘图时才导入 matplotlib。
+"""
+
+import os
+import queue
+import sys
+import threading
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from 素数核心 import (
+    DB_PAGE_SIZE,
+    PRIME_DB_BIN,
+    PRIME_DB_JSON,
+    PRIME_DB_ND,
+    INTERACTIVE_ECM_SCHEDULE,
+    GenerationJob,
+    PrimeStore,
+    count_primes_in_ranges,
+    is_prime,
+    load_prime_db,
+    prime_factors,
+    prime_gap_statistics,
+    prove_prime,
+    save_primes_store,
+)
+
+# 界面线程轮询后台任务队列的间隔（毫秒）
+GUI_POLL_MS = 100
+
+
+class PrimeApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("素数生成器")
+        self.root.geometry("900x700")
+        self.notebook = ttk.Notebook(root)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.create_generate_page()
+        self.create_check_page()
+        self.create_db_page()
+        self.create_plot_page()
+        self.create_gap_page()
+
+    def create_generate_page(self):
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text="生成与保存")
+        tk.Label(frame, text="起始值：").grid(row=0, column=0, sticky='e', padx=6, pady=6)
+        self.start_var = tk.StringVar(value="1")
+        tk.Entry(frame, textvariable=self.start_var, width=20).grid(row=0, column=1, padx=6, pady=6)
+        tk.Label(frame, text="终止值：").grid(row=1, column=0, sticky='e', padx=6, pady=6)
+        self.end_var = tk.StringVar(value="100000")
+        tk.Entry(frame, textvariable=self.end_var, width=20).grid(row=1, column=1, padx=6, pady=6)
+        tk.Label(frame, text="个位筛选（留空表示不筛）：").grid(row=2, column=0, sticky='e', padx=6, pady=6)
+        self.digit_var = tk.StringVar()
+        tk.Entry(frame, textvariable=self.digit_var, width=20).grid(row=2, column=1, padx=6, pady=6)
+        tk.Button(frame, text="开始生成", command=self.generate_action, bg="#4CAF50", fg="white").grid(row=3, column=0, pady=8)
+        tk.Button(frame, text="继续上次任务", command=self.resume_action).grid(row=3, column=1, pady=8)
+        self.gen_text = tk.Text(frame, height=14, width=90, font=("Courier", 9))
+        self.gen_text.grid(row=4, column=0, columnspan=2, padx=6, pady=6)
+        self.gen_job = None
+
+    def generate_action(self):
+        if self.gen_job is not None:
+            messagebox.showwarning("提示", "已有生成任务在运行，请等待完成或先取消。")
+            return
+        try:
+            start = int(self.start_var.get().strip())
+            end = int(self.end_var.get().strip())
+            if start < 0 or end <= start:
+                raise ValueError
+        except Exception:
+            messagebox.showerror("输入错误", "请输入合理的起始与终止值！")
+            return
+        target_digit = None
+        d = self.digit_var.get().strip()
+        if d != "":
+            try:
+                td = int(d)
+                if 0 <= td <= 9:
+                    target_digit = td
+                else:
+                    raise ValueError
+            except Exception:
+                messagebox.showerror("输入错误", "个位筛选请输入 0-9 或留空！")
+                return
+        state = GenerationJob.pending(PRIME_DB_BIN)
+        if state and not messagebox.askyesno(
+                "未完成的任务", f"{state['start']} 到 {state['end']} 的生成任务尚未完成，开始新任务将放弃它的断点。继续？"):
+            return
+        self.start_job(GenerationJob(start, end, target_digit))
+
+    def resume_action(self):
+        if self.gen_job is not None:
+            messagebox.showwarning("提示", "已有生成任务在运行，请等待完成或先取消。")
+            return
+        job = GenerationJob.resume(PRIME_DB_BIN)
+        if job is None:
+            messagebox.showinfo("提示", "没有未完成的生成任务。")
+            return
+        self.start_job(job)
+
+    def start_job(self, job):
+        start, end = job.start, job.end
+        progress = tk.Toplevel(self.root)
+        progress.title("进度")
+        tk.Label(progress, text=f"正在生成 {start} 到 {end} 的素数...").pack(padx=10, pady=6)
+        pb = ttk.Progressbar(progress, orient='horizontal', length=400, mode='determinate')
+        pb.pack(padx=10, pady=6)
+        tk.Button(progress, text="取消", command=job.cancel).pack(pady=6)
+        progress.protocol("WM_DELETE_WINDOW", job.cancel)
+        self.gen_text.delete(1.0, tk.END)
+        self.gen_job, self.gen_progress, self.gen_pb = job, progress, pb
+        self.gen_shown = 0
+        job.spawn()
+        self.root.after(GUI_POLL_MS, self.poll_generation)
+
+    def poll_generation(self):
+        # 界面线程定时取走后台任务的事件，热循环里不碰 Tk
+        job = self.gen_job
+        finished = None
+        while finished is None:
+            try:
+                kind, value = job.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.gen_pb['value'] = min(100, value * 100)
+            elif kind == "preview":
+                self.gen_text.insert(tk.END, (", " if self.gen_shown else "") + ", ".join(map(str, value)))
+                self.gen_shown += len(value)
+            else:
+                finished = (kind, value)
+        if finished is None:
+            self.root.after(GUI_POLL_MS, self.poll_generation)
+            return
+        self.gen_job = None
+        try:
+            self.gen_progress.destroy()
+        except Exception:
+            pass
+        kind, value = finished
+        if kind == "error":
+            messagebox.showerror("错误", f"生成过程中出错: {value}\n已落盘的进度保留在断点中，可用“继续上次任务”接着生成。")
+            return
+        if job.count > len(job.preview):
+            self.gen_text.insert(tk.END, "...")
+        state = "已取消，" if value else ""
+        summary = f"{state}共找到 {job.count} 个素数（已保存到 {PRIME_DB_BIN}）：\n"
+        if job.skipped:
+            summary = f"已跳过素数库中已覆盖的 {job.skipped} 个整数。\n" + summary
+        self.gen_text.insert(1.0, summary)
+        if value:
+            messagebox.showinfo("已取消", f"任务已取消，已保存 {job.count} 个素数。\n可用“继续上次任务”从断点接着生成。")
+        else:
+            messagebox.showinfo("完成", f"已生成并保存 {job.count} 个素数（分块追加）！")
+
+    def create_check_page(self):
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text="素数判断")
+        tk.Label(frame, text="输入数字：").pack(pady=10)
+        self.check_var = tk.StringVar()
+        tk.Entry(frame, textvariable=self.check_var, width=30).pack()
+        self.certify_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="严格证明（超过 64 位时做 Pocklington n-1 证明）", variable=self.certify_var).pack()
+        self.check_button = tk.Button(frame, text="判断", command=self.check_action, bg="#2196F3", fg="white")
+        self.check_button.pack(pady=10)
+        self.check_text = tk.Text(frame, height=14, width=75, font=("Courier", 9))
+        self.check_text.pack(padx=10, pady=5)
+
+    def check_action(self):
+        try:
+            n = int(self.check_var.get().strip())
+            if n < 0:
+                raise ValueError
+        except Exception:
+            messagebox.showerror("错误", "请输入有效的非负整数！")
+            return
+        self.check_button.config(state=tk.DISABLED)
+        self.check_text.delete(1.0, tk.END)
+        self.check_text.insert(tk.END, f"正在判断 {n} ...\n")
+        self.run_task(lambda: self.check_number(n, self.certify_var.get()), self.show_check_result)
+
+    @staticmethod
+    def check_number(n, certify):
+        # 工作线程里运行：证明和分解可能耗时，返回要显示的文本
+        prime = is_prime(n)
+        if prime and n >= 2 ** 64:
+            if not certify:
+                return f"{n} 通过 BPSW 检验（概率素数，尚无已知反例）。\n"
+            try:
+                prime = prove_prime(n)
+            except RuntimeError as e:
+                return f"{n} 通过 BPSW 检验，但未能完成证明：\n{e}"
+            if prime:
+                return f"{n} 是素数（已由 Pocklington n-1 证明）。\n"
+        if prime:
+            save_primes_store([n])
+            return f"{n} 是素数。\n"
+        try:
+            factors = prime_factors(n, INTERACTIVE_ECM_SCHEDULE)
+        except RuntimeError as e:
+            return f"{n} 不是素数。\n{e}\n界面只跑较短的 ECM 计划，完整分解请用命令行 factor 子命令。"
+        return (f"{n} 不是素数。\n质因数分解：{' × '.join(map(str, factors))} = {n}\n"
+                f"质因数列表：{factors}")
+
+    def show_check_result(self, kind, value):
+        self.check_button.config(state=tk.NORMAL)
+        self.check_text.delete(1.0, tk.END)
+        if kind == "error":
+            messagebox.showerror("错误", f"判断过程中出错: {value}")
+            return
+        self.check_text.insert(tk.END, value)
+
+    def run_task(self, work, done):
+        # 在工作线程里执行 work()，结果经队列交回界面线程，由 done(kind, value) 处理；kind 为 "done" 或 "error"
+        events = queue.Queue()
+
+        def target():
+            try:
+                events.put(("done", work()))
+            except Exception as e:
+                events.put(("error", str(e)))
+
+        threading.Thread(target=target, daemon=True).start()
+        self.root.after(GUI_POLL_MS, self.poll_task, events, done)
+
+    def poll_task(self, events, done):
+        try:
+            kind, value = events.get_nowait()
+        except queue.Empty:
+            self.root.after(GUI_POLL_MS, self.poll_task, events, done)
+            return
+        done(kind, value)
+
+    def create_db_page(self):
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text="素数库")
+        tk.Button(frame, text="加载素数库", command=self.load_db, bg="#9C27B0", fg="white").pack(pady=10)
+        tk.Button(frame, text="清空素数库", command=self.clear_db, bg="#f44336", fg="white").pack(pady=5)
+        nav = tk.Frame(frame)
+        nav.pack(pady=5)
+        tk.Button(nav, text="上一页", command=lambda: self.show_db_page(self.db_page - 1)).pack(side=tk.LEFT, padx=4)
+        tk.Button(nav, text="下一页", command=lambda: self.show_db_page(self.db_page + 1)).pack(side=tk.LEFT, padx=4)
+        tk.Label(nav, text="跳转到数值：").pack(side=tk.LEFT, padx=4)
+        self.db_jump_var = tk.StringVar()
+        tk.Entry(nav, textvariable=self.db_jump_var, width=20).pack(side=tk.LEFT)
+        tk.Button(nav, text="跳转", command=self.jump_db_page).pack(side=tk.LEFT, padx=4)
+        self.db_text = tk.Text(frame, height=16, width=75, font=("Courier", 9))
+        self.db_text.pack(padx=10, pady=5)
+        self.db_view = None
+        self.db_page = 0
+
+    def load_db(self):
+        if self.db_view is not None:
+            self.db_view.close()
+        self.db_view = load_prime_db()
+        self.show_db_page(0)
+
+    def show_db_page(self, page):
+        self.db_text.delete(1.0, tk.END)
+        if not self.db_view:
+            self.db_text.insert(tk.END, "素数库为空。")
+            return
+        total = len(self.db_view)
+        pages = (total + DB_PAGE_SIZE - 1) // DB_PAGE_SIZE
+        self.db_page = min(max(page, 0), pages - 1)
+        lo = self.db_page * DB_PAGE_SIZE
+        chunk = self.db_view[lo: lo + DB_PAGE_SIZE]
+        self.db_text.insert(tk.END, f"素数库共 {total} 个素数（第 {self.db_page + 1}/{pages} 页）：\n")
+        for i in range(0, len(chunk), 20):
+            self.db_text.insert(tk.END, ", ".join(map(str, chunk[i:i+20])) + "\n")
+
+    def jump_db_page(self):
+        if not self.db_view:
+            return
+        try:
+            x = int(self.db_jump_var.get().strip())
+        except Exception:
+            messagebox.showerror("输入错误", "请输入整数！")
+            return
+        self.show_db_page(self.db_view.index_of(x) // DB_PAGE_SIZE)
+
+    def clear_db(self):
+        if self.db_view is not None:
+            self.db_view.close()
+            self.db_view = None
+        try:
+            PrimeStore(PRIME_DB_BIN).clear()
+            GenerationJob.discard(PRIME_DB_BIN)
+        except Exception:
+            pass
+        for filename in (PRIME_DB_JSON, PRIME_DB_ND):
+            if os.path.exists(filename):
+                try:
+                    os.remove(filename)
+                except Exception:
+                    pass
+        self.db_text.delete(1.0, tk.END)
+        self.db_text.insert(tk.END, "素数库已清空。")
+        messagebox.showinfo("提示", "素数库已清空！")
+
+    def create_plot_page(self):
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text="分布图")
+        tk.Label(frame, text="起始值：").grid(row=0, column=0, sticky='e', padx=10, pady=5)
+        self.plot_start_var = tk.StringVar(value="1")
+        tk.Entry(frame, textvariable=self.plot_start_var, width=25).grid(row=0, column=1, padx=10, pady=5)
+        tk.Label(frame, text="终止值：").grid(row=1, column=0, sticky='e', padx=10, pady=5)
+        self.plot_end_var = tk.StringVar(value="1000")
+        tk.Entry(frame, textvariable=self.plot_end_var, width=25).grid(row=1, column=1, padx=10, pady=5)
+        tk.Label(frame, text="区间大小：").grid(row=2, column=0, sticky='e', padx=10, pady=5)
+        self.interval_var = tk.StringVar(value="100")
+        tk.Entry(frame, textvariable=self.interval_var, width=25).grid(row=2, column=1, padx=10, pady=5)
+        self.plot_button = tk.Button(frame, text="生成分布图", command=self.plot_distribution, bg="#FF9800", fg="white")
+        self.plot_button.grid(row=3, column=0, columnspan=2, pady=10)
+        self.fig_frame = tk.Frame(frame)
+        self.fig_frame.grid(row=4, column=0, columnspan=2, padx=10, pady=10)
+
+    def plot_distribution(self):
+        try:
+            start = int(self.plot_start_var.get().strip())
+            end = int(self.plot_end_var.get().strip())
+            interval = int(self.interval_var.get().strip())
+            if start < 0 or end <= start or interval <= 0:
+                raise ValueError
+        except Exception:
+            messagebox.showerror("输入错误", "请输入合理的数值！")
+            return
+        self.plot_button.config(state=tk.DISABLED)
+        self.run_task(lambda: count_primes_in_ranges(start, end, interval), self.draw_distribution)
+
+    def draw_distribution(self, kind, value):
+        # 计数在工作线程里完成，作图留在界面线程
+        self.plot_button.config(state=tk.NORMAL)
+        if kind == "error":
+            messagebox.showerror("错误", f"统计过程中出错: {value}")
+            return
+        for widget in self.fig_frame.winfo_children():
+            widget.destroy()
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        ranges, counts = value
+        fig, ax = plt.subplots(figsize=(8, 5))
+        ax.bar(ranges, counts, color='lightgreen')
+        ax.set_title("素数区间分布")
+        ax.set_xlabel("数值区间")
+        ax.set_ylabel("素数个数")
+        plt.setp(ax.get_xticklabels(), rotation=45)
+        canvas = FigureCanvasTkAgg(fig, master=self.fig_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+    def create_gap_page(self):
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text="间隙统计")
+        form = tk.Frame(frame)
+        form.pack(pady=6)
+        self.gap_start_var = tk.StringVar(value="1")
+        self.gap_end_var = tk.StringVar(value="1000000")
+        self.gap_interval_var = tk.StringVar(value="100000")
+        for col, (text, var) in enumerate((("起始值：", self.gap_start_var), ("终止值：", self.gap_end_var),
+                                           ("区间大小：", self.gap_interval_var))):
+            tk.Label(form, text=text).grid(row=0, column=2 * col, sticky='e', padx=4)
+            tk.Entry(form, textvariable=var, width=14).grid(row=0, column=2 * col + 1, padx=4)
+        self.gap_button = tk.Button(form, text="开始统计", command=self.gap_action, bg="#009688", fg="white")
+        self.gap_button.grid(row=0, column=6, padx=8)
+        columns = ("range", "count", "max_gap", "max_gap_at", "twins", "cousins", "sexy")
+        headings = ("区间", "素数个数", "最大间隙", "最大间隙起点", "孪生素数对", "表兄弟素数对", "六素数对")
+        self.gap_tree = ttk.Treeview(frame, columns=columns, show="headings", height=12)
+        for column, heading in zip(columns, headings):
+            self.gap_tree.heading(column, text=heading)
+            self.gap_tree.column(column, width=160 if column == "range" else 100, anchor='center')
+        self.gap_tree.pack(padx=10, pady=5, fill=tk.X)
+        self.gap_tree.bind("<<TreeviewSelect>>", self.show_gap_detail)
+        self.gap_text = tk.Text(frame, height=12, width=100, font=("Courier", 9))
+        self.gap_text.pack(padx=10, pady=5)
+        self.gap_buckets = []
+
+    def gap_action(self):
+        try:
+            start = int(self.gap_start_var.get().strip())
+            end = int(self.gap_end_var.get().strip())
+            interval = int(self.gap_interval_var.get().strip())
+            if start < 0 or end <= start or interval <= 0:
+                raise ValueError
+        except Exception:
+            messagebox.showerror("输入错误", "请输入合理的数值！")
+            return
+        self.gap_button.config(state=tk.DISABLED)
+        self.gap_text.delete(1.0, tk.END)
+        self.gap_text.insert(tk.END, f"正在统计 {start} 到 {end} ...\n")
+        self.run_task(lambda: prime_gap_statistics(start, end, interval), self.show_gap_statistics)
+
+    def show_gap_statistics(self, kind, value):
+        self.gap_button.config(state=tk.NORMAL)
+        if kind == "error":
+            messagebox.showerror("错误", f"统计过程中出错: {value}")
+            return
+        self.gap_buckets = value
+        self.gap_tree.delete(*self.gap_tree.get_children())
+        for i, b in enumerate(self.gap_buckets):
+            at = "-" if b.max_gap_at is None else b.max_gap_at
+            self.gap_tree.insert("", tk.END, iid=str(i), values=(b.label, b.count, b.max_gap, at, b.twins, b.cousins, b.sexy))
+        self.gap_text.delete(1.0, tk.END)
+        if not self.gap_buckets:
+            # 区间整体小于 2 时没有任何分桶
+            self.gap_text.insert(tk.END, "该范围内没有素数。\n")
+            return
+        total = sum(b.count for b in self.gap_buckets)
+        widest = max(self.gap_buckets, key=lambda b: b.max_gap)
+        at = "-" if widest.max_gap_at is None else widest.max_gap_at
+        self.gap_text.insert(tk.END, f"共 {total} 个素数；最大间隙 {widest.max_gap}（起点 {at}）；"
+                                     f"孪生 {sum(b.twins for b in self.gap_buckets)} 对，"
+                                     f"表兄弟 {sum(b.cousins for b in self.gap_buckets)} 对，"
+                                     f"六素数 {sum(b.sexy for b in self.gap_buckets)} 对。\n选中一行查看该区间的间隙直方图。\n")
+
+    def show_gap_detail(self, event=None):
+        selected = self.gap_tree.selection()
+        if not selected:
+            return
+        b = self.gap_buckets[int(selected[0])]
+        self.gap_text.delete(1.0, tk.END)
+        self.gap_text.insert(tk.END, f"区间 {b.label}：{b.count} 个素数\n")
+        names = {2: "孪生", 4: "表兄弟", 6: "六素数"}
+        firsts = "，".join(f"{names[d]} ({p}, {p + d})" for d, p in sorted(b.first_pairs.items()))
+        if firsts:
+            self.gap_text.insert(tk.END, f"首对：{firsts}\n")
+        self.gap_text.insert(tk.END, f"{'间隙':>6}{'次数':>10}{'首次出现':>14}\n")
+        for g in sorted(b.gaps):
+            self.gap_text.insert(tk.END, f"{g:>8}{b.gaps[g]:>12}{b.first[g]:>18}\n")
+
+
+def run_gui():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"无法启动图形界面（{e}）；命令行用法见 --help", file=sys.stderr)
+        return 2
+    PrimeApp(root)
+    root.mainloop()
+    return 0